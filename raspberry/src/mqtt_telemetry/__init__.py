@@ -8,15 +8,26 @@ __email__ = "esoglobine@gmail.com"
 
 from .client import MqttTelemetryClient
 from .config import Config
+from .message import TelemetryMessage
 from .schema import SchemaValidator
-from .storage import StorageBackend, SQLiteStorage, PostgreSQLStorage, FilesystemStorage
+from .storage import StorageBackend
 
 __all__ = [
     "MqttTelemetryClient",
     "Config",
+    "TelemetryMessage",
     "SchemaValidator",
     "StorageBackend",
     "SQLiteStorage",
     "PostgreSQLStorage",
     "FilesystemStorage",
 ]
+
+
+def __getattr__(name: str):
+    """Import storage backend classes on first use"""
+    if name in ("SQLiteStorage", "PostgreSQLStorage", "FilesystemStorage"):
+        from . import storage
+        return getattr(storage, name)
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
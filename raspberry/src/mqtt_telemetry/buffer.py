@@ -3,13 +3,112 @@ Message buffer for async processing
 """
 
 import asyncio
-from typing import List, Dict, Any, Optional
-from collections import deque
+from typing import List, Dict, Any, Iterator, Optional
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+class _RingBuffer:
+    """
+    Fixed-capacity FIFO ring
+
+    Capacity is rounded up to a power of two so slots are addressed with
+    a bitmask instead of a modulo.
+    """
+
+    __slots__ = ("_slots", "_mask", "_head", "_tail")
+
+    def __init__(self, capacity: int):
+        size = 1 << (capacity - 1).bit_length()
+        self._slots: List[Any] = [None] * size
+        self._mask = size - 1
+        self._head = 0
+        self._tail = 0
+
+    def __len__(self) -> int:
+        return self._head - self._tail
+
+    def __iter__(self) -> Iterator[Any]:
+        slots, mask = self._slots, self._mask
+        return (slots[index & mask] for index in range(self._tail, self._head))
+
+    def append(self, item: Any):
+        self._slots[self._head & self._mask] = item
+        self._head += 1
+
+    def popleft(self) -> Any:
+        index = self._tail & self._mask
+        item = self._slots[index]
+        self._slots[index] = None
+        self._tail += 1
+        return item
+
+    def extendleft(self, items: List[Any]):
+        """Insert items at the front, keeping their order"""
+        if len(self) + len(items) > len(self._slots):
+            raise OverflowError("Not enough free slots in ring buffer")
+
+        self._tail -= len(items)
+        for offset, item in enumerate(items):
+            self._slots[(self._tail + offset) & self._mask] = item
+
+    def popmany(self, count: int) -> List[Any]:
+        """Remove and return up to count items from the front"""
+        count = min(count, len(self))
+        slots = self._slots
+        start = self._tail & self._mask
+        end = start + count
+
+        if end <= len(slots):
+            items = slots[start:end]
+            slots[start:end] = [None] * count
+        else:
+            # Wrapped around the end of the slot list
+            wrapped = end - len(slots)
+            items = slots[start:] + slots[:wrapped]
+            slots[start:] = [None] * (len(slots) - start)
+            slots[:wrapped] = [None] * wrapped
+
+        self._tail += count
+        return items
+
+
+class _RingQueue(asyncio.Queue):
+    """
+    asyncio.Queue storing its items in a preallocated ring
+
+    Overrides the storage hooks asyncio.Queue calls internally (_init,
+    _put, _get) and uses its waiter bookkeeping (_getters, _putters,
+    _wakeup_next) for the bulk operations. Queue._format, used by repr(),
+    iterates self._queue, which _RingBuffer supports.
+    """
+
+    def _init(self, maxsize: int):
+        self._queue = _RingBuffer(maxsize)
+
+    def _put(self, item: Any):
+        self._queue.append(item)
+
+    def _get(self) -> Any:
+        return self._queue.popleft()
+
+    def put_many_front_nowait(self, items: List[Any]):
+        """Put items back at the front without checking capacity"""
+        self._queue.extendleft(items)
+        if self._getters:
+            for _ in items:
+                self._wakeup_next(self._getters)
+
+    def get_many_nowait(self, count: int) -> List[Any]:
+        """Remove and return up to count items without waiting"""
+        items = self._queue.popmany(count)
+        if self._putters:
+            for _ in items:
+                self._wakeup_next(self._putters)
+        return items
+
+
 class MessageBuffer:
     """
     Circular buffer for MQTT messages
@@ -23,13 +122,14 @@ class MessageBuffer:
         flush_interval: float = 5.0,
         batch_size: int = 100
     ):
+        if size < 1:
+            raise ValueError("Buffer size must be at least 1")
+
         self.size = size
         self.flush_interval = flush_interval
         self.batch_size = batch_size
 
-        self._buffer: deque = deque(maxlen=size)
-        self._lock = asyncio.Lock()
-        self._not_empty = asyncio.Event()
+        self._buffer: _RingQueue = _RingQueue(maxsize=size)
 
         self._dropped_count = 0
 
@@ -48,51 +148,89 @@ class MessageBuffer:
         Returns:
             True if added, False if buffer is full and message was dropped
         """
-        async with self._lock:
-            if len(self._buffer) >= self.size:
-                # Buffer full - drop oldest or reject
-                self._dropped_count += 1
-                logger.warning(
-                    f"Buffer full! Dropped {self._dropped_count} messages total"
-                )
-                return False
-
-            self._buffer.append(message)
-            self._not_empty.set()
+        try:
+            self._buffer.put_nowait(message)
             return True
+        except asyncio.QueueFull:
+            # Buffer full - reject
+            self._dropped_count += 1
+            logger.warning(
+                f"Buffer full! Dropped {self._dropped_count} messages total"
+            )
+            return False
+
+    async def requeue(self, messages: List[Dict[str, Any]]) -> int:
+        """
+        Put messages back at the front of the buffer
+
+        Used for batches that could not be stored, so they are retried
+        before newer messages. Messages that no longer fit are dropped.
+
+        Args:
+            messages: Messages in their original order
+
+        Returns:
+            Number of messages requeued
+        """
+        return self._put_front(messages)
+
+    def _put_front(self, messages: List[Dict[str, Any]]) -> int:
+        """Put messages back at the front, dropping those that don't fit"""
+        free = self.size - self._buffer.qsize()
+        if len(messages) > free:
+            self._dropped_count += len(messages) - free
+            logger.warning(
+                f"Buffer full! Dropped {self._dropped_count} messages total"
+            )
+            messages = messages[:free]
+
+        self._buffer.put_many_front_nowait(messages)
+        return len(messages)
 
     async def get_batch(self, timeout: Optional[float] = None) -> List[Dict[str, Any]]:
         """
         Get batch of messages from buffer
 
+        Once the first message arrives, keeps collecting until the batch
+        holds batch_size messages or flush_interval seconds have passed,
+        whichever comes first.
+
         Args:
-            timeout: Max time to wait for messages
+            timeout: Max time to wait for the first message
 
         Returns:
             List of messages (up to batch_size)
         """
+        loop = asyncio.get_running_loop()
+
         try:
-            # Wait for messages with timeout
-            await asyncio.wait_for(self._not_empty.wait(), timeout=timeout)
+            # Wait for the first message with timeout
+            first = await asyncio.wait_for(self._buffer.get(), timeout=timeout)
         except asyncio.TimeoutError:
-            pass
+            return []
 
-        async with self._lock:
-            if not self._buffer:
-                self._not_empty.clear()
-                return []
+        batch = [first]
+        deadline = loop.time() + self.flush_interval
 
-            # Get up to batch_size messages
-            batch = []
-            for _ in range(min(self.batch_size, len(self._buffer))):
-                if self._buffer:
-                    batch.append(self._buffer.popleft())
+        try:
+            while True:
+                # Drain whatever is already buffered in one slice
+                batch.extend(self._buffer.get_many_nowait(self.batch_size - len(batch)))
 
-            # Clear event if buffer is now empty
-            if not self._buffer:
-                self._not_empty.clear()
+                remaining = deadline - loop.time()
+                if len(batch) >= self.batch_size or remaining <= 0:
+                    return batch
 
-            return batch
+                try:
+                    batch.append(
+                        await asyncio.wait_for(self._buffer.get(), timeout=remaining)
+                    )
+                except asyncio.TimeoutError:
+                    return batch
+        except asyncio.CancelledError:
+            # Don't lose a partially collected batch on shutdown
+            self._put_front(batch)
+            raise
 
     async def flush(self) -> List[Dict[str, Any]]:
         """
@@ -101,29 +239,25 @@ class MessageBuffer:
         Returns:
             All buffered messages
         """
-        async with self._lock:
-            messages = list(self._buffer)
-            self._buffer.clear()
-            self._not_empty.clear()
-            return messages
+        return self._buffer.get_many_nowait(self._buffer.qsize())
 
     def usage_percent(self) -> float:
         """Get buffer usage percentage"""
-        return (len(self._buffer) / self.size) * 100
+        return (self._buffer.qsize() / self.size) * 100
 
     def __len__(self) -> int:
         """Get current buffer size"""
-        return len(self._buffer)
+        return self._buffer.qsize()
 
     @property
     def is_empty(self) -> bool:
         """Check if buffer is empty"""
-        return len(self._buffer) == 0
+        return self._buffer.qsize() == 0
 
     @property
     def is_full(self) -> bool:
         """Check if buffer is full"""
-        return len(self._buffer) >= self.size
+        return self._buffer.qsize() >= self.size
 
     @property
     def dropped_count(self) -> int:
@@ -8,6 +8,12 @@ from typing import Optional, Callable, Dict, Any, List
 from datetime import datetime
 import json
 
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
 import paho.mqtt.client as mqtt
 from asyncio_mqtt import Client as AsyncMqttClient
 
@@ -15,6 +21,7 @@ from .config import Config
 from .schema import SchemaValidator
 from .storage import get_storage_backend
 from .buffer import MessageBuffer
+from .message import TelemetryMessage
 from .stats import Statistics
 
 logger = logging.getLogger(__name__)
@@ -144,7 +151,6 @@ class MqttTelemetryClient:
 
         # Start background tasks
         self.tasks = [
-            asyncio.create_task(self._message_processor()),
             asyncio.create_task(self._storage_worker()),
             asyncio.create_task(self._health_monitor()),
             asyncio.create_task(self._mqtt_listener())
@@ -179,12 +185,15 @@ class MqttTelemetryClient:
 
     async def _mqtt_listener(self):
         """Listen for MQTT messages"""
+        # Bind once outside the per-message loop
+        handle_message = self._handle_message
+
         try:
             async with self.mqtt_client.messages() as messages:
                 async for message in messages:
-                    await self._handle_message(
+                    await handle_message(
                         message.topic.value,
-                        message.payload.decode(),
+                        message.payload,
                         message.timestamp
                     )
         except asyncio.CancelledError:
@@ -192,57 +201,62 @@ class MqttTelemetryClient:
         except Exception as e:
             logger.error(f"Error in MQTT listener: {e}")
 
-    async def _handle_message(self, topic: str, payload: str, timestamp: float):
-        """Handle incoming MQTT message"""
+    async def _handle_message(self, topic: str, payload: bytes, timestamp: float):
+        """
+        Handle incoming MQTT message
+
+        The payload stays as raw bytes; it is only decoded to str for the
+        user callback, and JSON parsing works on the bytes directly.
+        """
+        stats = self.stats
+        validator = self.validator
+
         try:
-            self.stats.increment("messages_received")
+            stats.increment("messages_received")
 
             # Call user callback
-            if self.message_callback:
-                await self.message_callback(topic, payload)
-
-            # Validate schema
-            if self.validator.enabled:
-                validation_result = self.validator.validate(topic, payload)
+            message_callback = self.message_callback
+            if message_callback:
+                await message_callback(topic, payload.decode())
+
+            # Validate schema (the validator parses the payload for us)
+            data = None
+            if validator.enabled:
+                validation_result = validator.validate(topic, payload)
                 if not validation_result.valid:
-                    self.stats.increment("validation_errors")
+                    stats.increment("validation_errors")
                     logger.warning(
                         f"Schema validation failed for topic {topic}: "
                         f"{validation_result.error}"
                     )
                     return
+                data = validation_result.data
+
+            if data is None:
+                data = _json_loads(payload)
 
             # Add to buffer
-            message = {
-                "topic": topic,
-                "payload": json.loads(payload),
-                "timestamp": datetime.fromtimestamp(timestamp),
-                "received_at": datetime.now()
-            }
+            message = TelemetryMessage(
+                topic,
+                data,
+                datetime.fromtimestamp(timestamp),
+                datetime.now()
+            )
 
             await self.buffer.push(message)
 
         except Exception as e:
             logger.error(f"Error handling message: {e}")
-            self.stats.increment("processing_errors")
-
-    async def _message_processor(self):
-        """Process messages from buffer"""
-        while self.running:
-            try:
-                await asyncio.sleep(0.1)
-                # Buffer processes itself with flush intervals
-            except asyncio.CancelledError:
-                break
-            except Exception as e:
-                logger.error(f"Error in message processor: {e}")
+            stats.increment("processing_errors")
 
     async def _storage_worker(self):
         """Worker for storing messages to backend"""
         while self.running:
             try:
                 # Get batch of messages from buffer
-                messages = await self.buffer.get_batch()
+                messages = await self.buffer.get_batch(
+                    timeout=self.buffer.flush_interval
+                )
 
                 if messages:
                     # Store to backend
@@ -252,11 +266,10 @@ class MqttTelemetryClient:
                         self.stats.add("messages_stored", len(messages))
                     else:
                         self.stats.add("storage_errors", len(messages))
-                        # Put messages back in buffer
-                        for msg in messages:
-                            await self.buffer.push(msg)
-
-                await asyncio.sleep(0.1)
+                        # Put messages back at the front of the buffer
+                        await self.buffer.requeue(messages)
+                        # Back off before retrying the failed batch
+                        await asyncio.sleep(0.1)
 
             except asyncio.CancelledError:
                 break
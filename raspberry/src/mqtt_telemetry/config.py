@@ -3,11 +3,18 @@ Configuration management
 """
 
 import yaml
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 import os
 
 
+@lru_cache(maxsize=256)
+def _split_key(key: str) -> Tuple[str, ...]:
+    """Split a dotted configuration key into its parts"""
+    return tuple(key.split("."))
+
+
 class Config:
     """Configuration container"""
 
@@ -101,10 +108,9 @@ class Config:
 
     def get(self, key: str, default: Any = None) -> Any:
         """Get configuration value by key"""
-        keys = key.split(".")
         value = self._data
 
-        for k in keys:
+        for k in _split_key(key):
             if isinstance(value, dict):
                 value = value.get(k)
                 if value is None:
@@ -116,7 +122,7 @@ class Config:
 
     def set(self, key: str, value: Any):
         """Set configuration value"""
-        keys = key.split(".")
+        keys = _split_key(key)
         data = self._data
 
         for k in keys[:-1]:
@@ -0,0 +1,73 @@
+"""
+Telemetry message container
+"""
+
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, Tuple
+from datetime import datetime
+
+
+class TelemetryMessage(Mapping):
+    """
+    Message passed from the MQTT listener through the buffer to storage
+
+    Uses __slots__ instead of a per-message dict to keep buffer memory
+    low. It is a read-only Mapping of its fields (message["topic"],
+    message.get("topic"), "topic" in message, iteration), so storage
+    backends can handle it the same way as plain message dictionaries.
+    """
+
+    __slots__ = ("topic", "payload", "timestamp", "received_at")
+
+    def __init__(
+        self,
+        topic: str,
+        payload: Any,
+        timestamp: datetime,
+        received_at: datetime
+    ):
+        self.topic = topic
+        self.payload = payload
+        self.timestamp = timestamp
+        self.received_at = received_at
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.__slots__)
+
+    def __len__(self) -> int:
+        return len(self.__slots__)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.__slots__
+
+    def keys(self) -> Tuple[str, ...]:
+        """Get field names"""
+        return self.__slots__
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary"""
+        return {key: getattr(self, key) for key in self.__slots__}
+
+    def __repr__(self) -> str:
+        return (
+            f"TelemetryMessage(topic={self.topic!r}, "
+            f"timestamp={self.timestamp!r})"
+        )
+
+
+def message_fields(message: Mapping) -> Tuple[str, Any, datetime, datetime]:
+    """
+    Get (topic, payload, timestamp, received_at) of a message
+
+    TelemetryMessage attributes are read directly, which is several times
+    faster than going through its __getitem__; plain message dictionaries
+    are indexed by key.
+    """
+    if type(message) is TelemetryMessage:
+        return message.topic, message.payload, message.timestamp, message.received_at
+    return message["topic"], message["payload"], message["timestamp"], message["received_at"]
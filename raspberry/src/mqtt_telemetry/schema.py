@@ -5,15 +5,38 @@ Schema validation module
 import json
 import yaml
 from pathlib import Path
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Callable, Tuple, Union, Pattern, FrozenSet
 from dataclasses import dataclass
-import jsonschema
-from jsonschema import validate, ValidationError
 import logging
 import re
 
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+# libyaml-backed loader when PyYAML was built with it
+_YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+SCHEMA_FILE_SUFFIXES = (".yaml", ".yml")
+
 logger = logging.getLogger(__name__)
 
+# Schema field type -> accepted Python types
+_TYPE_MAP = {
+    "string": str,
+    "integer": int,
+    "float": (float, int),
+    "double": (float, int),
+    "boolean": bool,
+    "array": list,
+    "object": dict
+}
+
+# Maximum number of distinct topics remembered by the topic -> schema cache
+TOPIC_CACHE_SIZE = 4096
+
 
 @dataclass
 class ValidationResult:
@@ -21,6 +44,16 @@ class ValidationResult:
     valid: bool
     error: Optional[str] = None
     errors: List[str] = None
+    data: Any = None
+
+
+@dataclass
+class _CompiledSchema:
+    """Schema data precomputed once by add_schema"""
+    field_checks: List[Tuple[str, bool, Callable[[Any], List[str]]]]  # (name, required, check)
+    field_names: FrozenSet[str]
+    strict: bool
+    allow_extra: bool
 
 
 class SchemaValidator:
@@ -30,6 +63,10 @@ class SchemaValidator:
         self.enabled = enabled
         self.schemas: Dict[str, Dict[str, Any]] = {}
         self.topic_patterns: Dict[str, str] = {}  # topic_pattern -> schema_name
+        # topic_pattern -> (compiled regex, schema_name)
+        self._topic_regexes: Dict[str, Tuple[Pattern, str]] = {}
+        self._topic_cache: Dict[str, Optional[Dict[str, Any]]] = {}
+        self._compiled: Dict[str, _CompiledSchema] = {}
 
         if schema_path:
             self.load_schemas_from_directory(schema_path)
@@ -42,14 +79,11 @@ class SchemaValidator:
             logger.warning(f"Schema directory not found: {directory}")
             return
 
-        # Load schema files
-        for schema_file in path.rglob("*.yaml"):
-            try:
-                self.load_schema_file(str(schema_file))
-            except Exception as e:
-                logger.error(f"Failed to load schema {schema_file}: {e}")
+        # Load schema files in a single directory walk
+        for schema_file in path.rglob("*"):
+            if schema_file.suffix.lower() not in SCHEMA_FILE_SUFFIXES:
+                continue
 
-        for schema_file in path.rglob("*.yml"):
             try:
                 self.load_schema_file(str(schema_file))
             except Exception as e:
@@ -63,7 +97,7 @@ class SchemaValidator:
             if file_path.endswith('.json'):
                 schema = json.load(f)
             else:
-                schema = yaml.safe_load(f)
+                schema = yaml.load(f, Loader=_YamlLoader)
 
         self.add_schema(schema)
 
@@ -74,43 +108,49 @@ class SchemaValidator:
             raise ValueError("Schema must have a 'name' field")
 
         self.schemas[name] = schema
+        self._topic_cache.clear()
+        self._compiled[name] = self._compile_schema(schema)
 
         # Register topic pattern
         if "topic_pattern" in schema:
-            self.topic_patterns[schema["topic_pattern"]] = name
+            pattern = schema["topic_pattern"]
+            self.topic_patterns[pattern] = name
+            self._topic_regexes[pattern] = (self._compile_topic_pattern(pattern), name)
 
         logger.debug(f"Added schema: {name}")
 
-    def validate(self, topic: str, payload: str) -> ValidationResult:
+    def validate(self, topic: str, payload: Union[str, bytes]) -> ValidationResult:
         """
         Validate message against schema
 
         Args:
             topic: MQTT topic
-            payload: Message payload (JSON string)
+            payload: Message payload (JSON string or UTF-8 bytes)
 
         Returns:
-            ValidationResult
+            ValidationResult, carrying the parsed payload in ``data``
         """
         if not self.enabled:
             return ValidationResult(valid=True)
 
         try:
             # Parse payload
-            data = json.loads(payload)
+            data = _json_loads(payload)
 
             # Find matching schema
             schema = self._find_schema_for_topic(topic)
             if not schema:
                 logger.debug(f"No schema found for topic: {topic}")
-                return ValidationResult(valid=True)
+                return ValidationResult(valid=True, data=data)
 
             # Validate fields
             result = self._validate_fields(data, schema)
+            result.data = data
 
             return result
 
         except json.JSONDecodeError as e:
+            # orjson.JSONDecodeError subclasses json.JSONDecodeError
             return ValidationResult(
                 valid=False,
                 error=f"Invalid JSON: {e}"
@@ -123,140 +163,181 @@ class SchemaValidator:
             )
 
     def _find_schema_for_topic(self, topic: str) -> Optional[Dict[str, Any]]:
-        """Find schema matching the topic"""
-        for pattern, schema_name in self.topic_patterns.items():
-            if self._topic_matches_pattern(topic, pattern):
-                return self.schemas.get(schema_name)
-        return None
-
-    def _topic_matches_pattern(self, topic: str, pattern: str) -> bool:
-        """Check if topic matches MQTT pattern with wildcards"""
-        # Convert MQTT wildcards to regex
+        """Find schema matching the topic (cached per topic)"""
+        try:
+            return self._topic_cache[topic]
+        except KeyError:
+            pass
+
+        schema = None
+        for regex, schema_name in self._topic_regexes.values():
+            if regex.match(topic):
+                schema = self.schemas.get(schema_name)
+                break
+
+        if len(self._topic_cache) >= TOPIC_CACHE_SIZE:
+            # Evict the oldest entry
+            del self._topic_cache[next(iter(self._topic_cache))]
+        self._topic_cache[topic] = schema
+
+        return schema
+
+    @staticmethod
+    def _compile_topic_pattern(pattern: str) -> Pattern:
+        """Compile MQTT pattern with wildcards to a regex"""
         # + matches single level
         # # matches multiple levels
+        levels = []
+        for level in pattern.split("/"):
+            if level == "+":
+                levels.append("[^/]+")
+            elif level == "#":
+                levels.append(".*")
+            else:
+                levels.append(re.escape(level))
 
-        regex_pattern = pattern.replace("+", "[^/]+")
-        regex_pattern = regex_pattern.replace("#", ".*")
-        regex_pattern = f"^{regex_pattern}$"
-
-        return bool(re.match(regex_pattern, topic))
+        return re.compile("^" + "/".join(levels) + "$")
 
     def _validate_fields(self, data: Dict[str, Any], schema: Dict[str, Any]) -> ValidationResult:
         """Validate data fields against schema"""
         errors = []
-
-        fields = schema.get("fields", [])
-        validation_config = schema.get("validation", {})
-        strict = validation_config.get("strict", True)
-        allow_extra = validation_config.get("allow_extra_fields", False)
+        compiled = self._compiled[schema["name"]]
 
         # Check required fields
-        for field_def in fields:
-            field_name = field_def["name"]
-            required = field_def.get("required", False)
-            auto_fill = field_def.get("auto_fill", False)
-
-            if required and not auto_fill and field_name not in data:
-                errors.append(f"Missing required field: {field_name}")
-                continue
-
+        for field_name, required, check in compiled.field_checks:
             if field_name not in data:
+                if required:
+                    errors.append(f"Missing required field: {field_name}")
                 continue
 
             # Validate field value
-            value = data[field_name]
-            field_errors = self._validate_field_value(value, field_def)
-            errors.extend(field_errors)
+            errors.extend(check(data[field_name]))
 
         # Check for extra fields
-        if not allow_extra:
-            expected_fields = {f["name"] for f in fields}
-            extra_fields = set(data.keys()) - expected_fields
+        if not compiled.allow_extra:
+            extra_fields = data.keys() - compiled.field_names
 
             if extra_fields:
                 errors.append(f"Unexpected fields: {', '.join(extra_fields)}")
 
         if errors:
             return ValidationResult(
-                valid=False if strict else True,
+                valid=False if compiled.strict else True,
                 error="; ".join(errors),
                 errors=errors
             )
 
         return ValidationResult(valid=True)
 
-    def _validate_field_value(self, value: Any, field_def: Dict[str, Any]) -> List[str]:
-        """Validate individual field value"""
-        errors = []
+    def _compile_schema(self, schema: Dict[str, Any]) -> _CompiledSchema:
+        """Precompute everything _validate_fields needs for a schema"""
+        fields = schema.get("fields", [])
+        validation_config = schema.get("validation", {})
+
+        return _CompiledSchema(
+            field_checks=[
+                (
+                    field_def["name"],
+                    field_def.get("required", False) and not field_def.get("auto_fill", False),
+                    self._compile_field_check(field_def)
+                )
+                for field_def in fields
+            ],
+            field_names=frozenset(f["name"] for f in fields),
+            strict=validation_config.get("strict", True),
+            allow_extra=validation_config.get("allow_extra_fields", False)
+        )
+
+    def _compile_field_check(self, field_def: Dict[str, Any]) -> Callable[[Any], List[str]]:
+        """
+        Build a validator function for a single field
+
+        Only the rules present in the field definition are included, and
+        patterns are compiled once here instead of on every message.
+        """
         field_name = field_def["name"]
         field_type = field_def.get("type", "string")
+        validation = field_def.get("validation") or {}
+        rules: List[Callable[[Any], Optional[str]]] = []
+
+        # Numeric range
+        if "min" in validation:
+            minimum = validation["min"]
+
+            def check_min(value):
+                if isinstance(value, (int, float)) and value < minimum:
+                    return f"{field_name} below minimum: {value} < {minimum}"
+
+            rules.append(check_min)
+
+        if "max" in validation:
+            maximum = validation["max"]
+
+            def check_max(value):
+                if isinstance(value, (int, float)) and value > maximum:
+                    return f"{field_name} above maximum: {value} > {maximum}"
+
+            rules.append(check_max)
+
+        # String length
+        if "min_length" in validation:
+            min_length = validation["min_length"]
+
+            def check_min_length(value):
+                if isinstance(value, str) and len(value) < min_length:
+                    return f"{field_name} too short: {len(value)} < {min_length}"
+
+            rules.append(check_min_length)
+
+        if "max_length" in validation:
+            max_length = validation["max_length"]
+
+            def check_max_length(value):
+                if isinstance(value, str) and len(value) > max_length:
+                    return f"{field_name} too long: {len(value)} > {max_length}"
+
+            rules.append(check_max_length)
+
+        # Pattern matching
+        if "pattern" in validation:
+            pattern = validation["pattern"]
+            regex = re.compile(pattern)
+
+            def check_pattern(value):
+                if isinstance(value, str) and not regex.match(value):
+                    return f"{field_name} does not match pattern: {pattern}"
+
+            rules.append(check_pattern)
+
+        # Enum values
+        if "enum" in validation:
+            allowed = validation["enum"]
+
+            def check_enum(value):
+                if value not in allowed:
+                    return f"{field_name} not in allowed values: {allowed}"
+
+            rules.append(check_enum)
+
+        type_error = f"Type mismatch for {field_name}: expected {field_type}"
+
+        def check(value: Any) -> List[str]:
+            # Type validation
+            if not self._check_type(value, field_type):
+                return [type_error]
 
-        # Type validation
-        type_valid = self._check_type(value, field_type)
-        if not type_valid:
-            errors.append(f"Type mismatch for {field_name}: expected {field_type}")
+            errors = []
+            for rule in rules:
+                error = rule(value)
+                if error:
+                    errors.append(error)
             return errors
 
-        # Validation rules
-        if "validation" in field_def:
-            validation = field_def["validation"]
-
-            # Numeric range
-            if "min" in validation:
-                if isinstance(value, (int, float)) and value < validation["min"]:
-                    errors.append(
-                        f"{field_name} below minimum: {value} < {validation['min']}"
-                    )
-
-            if "max" in validation:
-                if isinstance(value, (int, float)) and value > validation["max"]:
-                    errors.append(
-                        f"{field_name} above maximum: {value} > {validation['max']}"
-                    )
-
-            # String length
-            if "min_length" in validation:
-                if isinstance(value, str) and len(value) < validation["min_length"]:
-                    errors.append(
-                        f"{field_name} too short: {len(value)} < {validation['min_length']}"
-                    )
-
-            if "max_length" in validation:
-                if isinstance(value, str) and len(value) > validation["max_length"]:
-                    errors.append(
-                        f"{field_name} too long: {len(value)} > {validation['max_length']}"
-                    )
-
-            # Pattern matching
-            if "pattern" in validation:
-                if isinstance(value, str):
-                    if not re.match(validation["pattern"], value):
-                        errors.append(
-                            f"{field_name} does not match pattern: {validation['pattern']}"
-                        )
-
-            # Enum values
-            if "enum" in validation:
-                if value not in validation["enum"]:
-                    errors.append(
-                        f"{field_name} not in allowed values: {validation['enum']}"
-                    )
-
-        return errors
+        return check
 
     def _check_type(self, value: Any, expected_type: str) -> bool:
         """Check if value matches expected type"""
-        type_map = {
-            "string": str,
-            "integer": int,
-            "float": (float, int),
-            "double": (float, int),
-            "boolean": bool,
-            "array": list,
-            "object": dict
-        }
-
-        expected_python_type = type_map.get(expected_type)
+        expected_python_type = _TYPE_MAP.get(expected_type)
         if expected_python_type is None:
             return True  # Unknown type, accept
 
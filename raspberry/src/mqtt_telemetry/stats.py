@@ -2,14 +2,20 @@
 Statistics tracking
 """
 
-from typing import Dict, Any, Set
+from typing import Dict, Any, Set, Tuple
 from datetime import datetime
 import time
 import threading
 
 
 class Statistics:
-    """Thread-safe statistics tracker"""
+    """
+    Statistics tracker
+
+    Counter and value updates are single dict operations without a lock;
+    they are made from the event loop thread on the per-message path.
+    The lock only guards subscriptions, reset and get_all snapshots.
+    """
 
     def __init__(self):
         self._stats: Dict[str, Any] = {
@@ -25,21 +31,22 @@ class Statistics:
             "uptime": 0,
         }
         self._subscriptions: Set[str] = set()
+        self._subscriptions_snapshot: Tuple[str, ...] = ()
         self._start_time = time.time()
+        self._start_time_iso = datetime.fromtimestamp(self._start_time).isoformat()
         self._lock = threading.Lock()
 
     def increment(self, key: str, value: int = 1):
         """Increment a counter"""
-        with self._lock:
-            if key in self._stats:
-                self._stats[key] += value
-            else:
-                self._stats[key] = value
+        stats = self._stats
+        try:
+            stats[key] += value
+        except KeyError:
+            stats[key] = value
 
     def set(self, key: str, value: Any):
         """Set a value"""
-        with self._lock:
-            self._stats[key] = value
+        self._stats[key] = value
 
     def add(self, key: str, value: Any):
         """Add to a value (alias for increment for numeric values)"""
@@ -47,26 +54,27 @@ class Statistics:
 
     def get(self, key: str, default: Any = None) -> Any:
         """Get a statistic value"""
-        with self._lock:
-            return self._stats.get(key, default)
+        return self._stats.get(key, default)
 
     def get_all(self) -> Dict[str, Any]:
         """Get all statistics"""
         with self._lock:
             stats = self._stats.copy()
-            stats["subscriptions"] = list(self._subscriptions)
-            stats["start_time"] = datetime.fromtimestamp(self._start_time).isoformat()
+            stats["subscriptions"] = self._subscriptions_snapshot
+            stats["start_time"] = self._start_time_iso
             return stats
 
     def add_subscription(self, topic: str):
         """Add a topic subscription"""
         with self._lock:
             self._subscriptions.add(topic)
+            self._subscriptions_snapshot = tuple(self._subscriptions)
 
     def remove_subscription(self, topic: str):
         """Remove a topic subscription"""
         with self._lock:
             self._subscriptions.discard(topic)
+            self._subscriptions_snapshot = tuple(self._subscriptions)
 
     def uptime(self) -> float:
         """Get uptime in seconds"""
@@ -79,3 +87,4 @@ class Statistics:
                 if isinstance(self._stats[key], (int, float)):
                     self._stats[key] = 0
             self._start_time = time.time()
+            self._start_time_iso = datetime.fromtimestamp(self._start_time).isoformat()
@@ -1,11 +1,19 @@
 """
 Storage backends
+
+Backend modules are imported on first use, so the database drivers of
+unused backends (asyncpg, aiosqlite, ...) are never loaded.
 """
 
+import importlib
+from typing import TYPE_CHECKING
+
 from .base import StorageBackend, StorageInfo
-from .sqlite import SQLiteStorage
-from .postgresql import PostgreSQLStorage
-from .filesystem import FilesystemStorage
+
+if TYPE_CHECKING:
+    from .sqlite import SQLiteStorage
+    from .postgresql import PostgreSQLStorage
+    from .filesystem import FilesystemStorage
 
 __all__ = [
     "StorageBackend",
@@ -16,6 +24,24 @@ __all__ = [
     "get_storage_backend",
 ]
 
+# backend type -> (module, class name)
+BACKENDS = {
+    "sqlite": (".sqlite", "SQLiteStorage"),
+    "postgresql": (".postgresql", "PostgreSQLStorage"),
+    "filesystem": (".filesystem", "FilesystemStorage"),
+}
+
+_BACKEND_MODULES = {class_name: module for module, class_name in BACKENDS.values()}
+
+
+def __getattr__(name: str):
+    """Import backend classes lazily on attribute access"""
+    module = _BACKEND_MODULES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    return getattr(importlib.import_module(module, __name__), name)
+
 
 def get_storage_backend(backend_type: str, config: dict) -> StorageBackend:
     """
@@ -28,14 +54,11 @@ def get_storage_backend(backend_type: str, config: dict) -> StorageBackend:
     Returns:
         StorageBackend instance
     """
-    backends = {
-        "sqlite": SQLiteStorage,
-        "postgresql": PostgreSQLStorage,
-        "filesystem": FilesystemStorage,
-    }
-
-    backend_class = backends.get(backend_type.lower())
-    if not backend_class:
+    backend = BACKENDS.get(backend_type.lower())
+    if not backend:
         raise ValueError(f"Unknown storage backend: {backend_type}")
 
+    module, class_name = backend
+    backend_class = getattr(importlib.import_module(module, __name__), class_name)
+
     return backend_class(config)
@@ -3,7 +3,7 @@ Base storage backend interface
 """
 
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, AsyncIterator
 from dataclasses import dataclass
 from datetime import datetime
 
@@ -79,6 +79,25 @@ class StorageBackend(ABC):
         """
         pass
 
+    async def iter_query(
+        self,
+        topic: Optional[str] = None,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        limit: int = 1000
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Iterate over stored messages
+
+        Takes the same filters as query. Backends that can read results
+        incrementally override this; the default yields from query.
+
+        Yields:
+            Messages, newest first
+        """
+        for message in await self.query(topic, start_time, end_time, limit):
+            yield message
+
     @abstractmethod
     async def get_info(self) -> StorageInfo:
         """
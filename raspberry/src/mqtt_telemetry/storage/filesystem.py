@@ -2,18 +2,162 @@
 Filesystem storage backend
 """
 
+import asyncio
 import json
-import gzip
+import mmap
+import os
+import shutil
+import zlib
 import aiofiles
 from pathlib import Path
-from typing import List, Dict, Any, Optional
-from datetime import datetime
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional, Callable, Iterable, Iterator, Tuple
+from datetime import date, datetime, timedelta
 import logging
 
 from .base import StorageBackend, StorageInfo
+from ..message import message_fields
+
+try:
+    import orjson
+    _json_dumps = orjson.dumps
+    _json_loads = orjson.loads
+except ImportError:
+    def _json_dumps(obj: Any) -> bytes:
+        return json.dumps(obj).encode()
+
+    _json_loads = json.loads
 
 logger = logging.getLogger(__name__)
 
+# zlib window bits selecting the gzip container format
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+# Files are stored under base_path/YYYY/MM/DD/ by creation date
+DAY_DIR_FORMAT = "%Y/%m/%d"
+FILE_TIME_FORMAT = "%Y%m%d_%H%M%S"
+
+# Sidecar holding the message count and time range of a finished file
+META_SUFFIX = ".meta"
+
+# Batches queued for the background flusher, and the most it writes at once
+WRITE_QUEUE_SIZE = 64
+FLUSH_MAX_BATCHES = 16
+
+# Seconds the flusher waits before retrying batches it failed to write
+WRITE_RETRY_DELAY = 1.0
+
+# Bytes read per chunk when streaming compressed files during queries
+READ_CHUNK_SIZE = 4 * 1024 * 1024
+
+
+def _iter_decompressed(f, new_decompressor: Callable[[], Any]) -> Iterator[bytes]:
+    """
+    Decompress a file chunk by chunk
+
+    A new decompressor is started whenever one reaches the end of its
+    stream, so files made of several gzip members or zstd frames are read
+    completely. Files that are still being written (no end-of-stream
+    marker yet) yield everything flushed so far.
+    """
+    decompressor = new_decompressor()
+    for chunk in iter(lambda: f.read(READ_CHUNK_SIZE), b""):
+        while chunk:
+            if decompressor.eof:
+                decompressor = new_decompressor()
+            yield decompressor.decompress(chunk)
+            chunk = decompressor.unused_data
+
+
+def _iter_chunk_lines(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Split a stream of byte chunks into lines"""
+    pending = b""
+    for chunk in chunks:
+        lines = (pending + chunk).split(b"\n")
+        pending = lines.pop()
+        yield from lines
+    if pending:
+        yield pending
+
+
+def _iter_file_lines(file_path: Path) -> Iterator[bytes]:
+    """
+    Iterate over the raw lines of a storage file
+
+    Uncompressed files are memory-mapped and compressed files are
+    decompressed in chunks, so a file is never held in memory whole.
+    """
+    with open(file_path, "rb") as f:
+        if file_path.suffix == ".gz":
+            yield from _iter_chunk_lines(
+                _iter_decompressed(f, lambda: zlib.decompressobj(GZIP_WBITS))
+            )
+        elif file_path.suffix == ".zst":
+            import zstandard
+
+            decompressor = zstandard.ZstdDecompressor()
+            yield from _iter_chunk_lines(
+                _iter_decompressed(f, decompressor.decompressobj)
+            )
+        elif os.fstat(f.fileno()).st_size > 0:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                yield from iter(mm.readline, b"")
+
+
+def _file_time(file_path: Path) -> datetime:
+    """Get the creation time encoded in a storage file name"""
+    timestamp_str = file_path.name.split(".", 1)[0].split("_", 1)[1]
+    # Drop the sequence suffix of files created within the same second
+    return datetime.strptime(timestamp_str[:15], FILE_TIME_FORMAT)
+
+
+def _meta_path(file_path: Path) -> Path:
+    """Get the sidecar metadata path of a storage file"""
+    return file_path.with_name(file_path.name.split(".", 1)[0] + META_SUFFIX)
+
+
+def _parse_time(value: Optional[str]) -> Optional[datetime]:
+    """Parse an optional ISO timestamp"""
+    return datetime.fromisoformat(value) if value else None
+
+
+@dataclass
+class _FileStats:
+    """Message count, size and time range of one storage file"""
+    messages: int = 0
+    size_bytes: int = 0
+    oldest: Optional[datetime] = None
+    newest: Optional[datetime] = None
+
+
+@dataclass
+class _PendingWrite:
+    """Encoded batch waiting for the background flusher"""
+    data: bytes
+    messages: int
+    oldest: datetime
+    newest: datetime
+    sequence: int = 0  # position in queue order, set once queued
+
+
+def _topic_needles(topic: str) -> Tuple[bytes, ...]:
+    """
+    Get the byte strings a stored line for topic must contain
+
+    Covers compact (orjson) and default json.dumps separators, with and
+    without escaped non-ASCII characters.
+    """
+    encoded = {
+        _json_dumps(topic),
+        json.dumps(topic).encode(),
+        json.dumps(topic, ensure_ascii=False).encode(),
+    }
+    return tuple(
+        b'"topic"' + separator + value
+        for value in encoded
+        for separator in (b":", b": ")
+    )
+
 
 class FilesystemStorage(StorageBackend):
     """Filesystem storage backend"""
@@ -27,28 +171,132 @@ class FilesystemStorage(StorageBackend):
         self.max_file_size = fs_config.get("max_file_size_mb", 100) * 1024 * 1024
         self.current_file: Optional[Path] = None
         self.current_file_size = 0
+        self._current_day: Optional[date] = None
+        self._fh = None
+        self._compressor = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._flusher_task: Optional[asyncio.Task] = None
+        self._closed = False
+
+        # Sequence numbers of the last batch queued and the last batch the
+        # flusher has handled, so readers can wait for earlier batches
+        self._queued_sequence = 0
+        self._handled_sequence = 0
+        self._handled: Optional[asyncio.Condition] = None
+
+        # Batches the flusher failed to write and retries; store_batch
+        # refuses new batches until they are written
+        self._failed: List[_PendingWrite] = []
+        self._write_failed = False
+
+        # Running totals reported by get_info
+        self._files: Dict[Path, _FileStats] = {}
+        self._total_messages = 0
+        self._total_size = 0
+        self._oldest: Optional[datetime] = None
+        self._newest: Optional[datetime] = None
 
     async def initialize(self):
         """Initialize filesystem storage"""
         # Create base directory
         self.base_path.mkdir(parents=True, exist_ok=True)
 
+        # Load totals of existing files without blocking the event loop
+        loop = asyncio.get_running_loop()
+        self._files = await loop.run_in_executor(None, self._scan_files)
+        self._update_totals()
+
         # Create initial file
         await self._create_new_file()
 
+        # Start the background writer
+        self._queue = asyncio.Queue(maxsize=WRITE_QUEUE_SIZE)
+        self._handled = asyncio.Condition()
+        self._flusher_task = asyncio.create_task(self._flush_loop())
+
         logger.info(f"Filesystem storage initialized: {self.base_path}")
 
     async def _create_new_file(self):
-        """Create a new storage file"""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        """Create a new storage file in the directory for the current day"""
+        await self._close_file()
+
+        now = datetime.now()
         extension = self._get_extension()
-        filename = f"telemetry_{timestamp}.{extension}"
+        stem = f"telemetry_{now.strftime(FILE_TIME_FORMAT)}"
+
+        day_dir = self.base_path / now.strftime(DAY_DIR_FORMAT)
+        day_dir.mkdir(parents=True, exist_ok=True)
 
-        self.current_file = self.base_path / filename
+        # Never append to a file finished earlier within the same second
+        file_path = day_dir / f"{stem}.{extension}"
+        sequence = 1
+        while file_path in self._files or file_path.exists():
+            file_path = day_dir / f"{stem}_{sequence}.{extension}"
+            sequence += 1
+
+        self.current_file = file_path
         self.current_file_size = 0
+        self._current_day = now.date()
+        self._files.setdefault(self.current_file, _FileStats())
+
+        # Keep the file open for appending until the next rotation
+        self._fh = await aiofiles.open(self.current_file, 'ab')
+        self._compressor = self._new_compressor()
 
         logger.info(f"Created new file: {self.current_file}")
 
+    async def _close_file(self):
+        """Finish the compressed stream, close the current file and write its sidecar"""
+        if self._fh is None:
+            return
+
+        # Stats are gone if cleanup already deleted the file
+        stats = self._files.get(self.current_file)
+
+        try:
+            if self._compressor is not None:
+                tail = self._compressor.flush()
+                await self._fh.write(tail)
+                if stats is not None:
+                    stats.size_bytes += len(tail)
+                    self._total_size += len(tail)
+
+            await self._fh.close()
+        except Exception as e:
+            logger.warning(f"Failed to finish {self.current_file}: {e}")
+
+        self._compressor = None
+        self._fh = None
+
+        if stats is None:
+            return
+
+        try:
+            async with aiofiles.open(_meta_path(self.current_file), 'wb') as f:
+                await f.write(_json_dumps({
+                    "messages": stats.messages,
+                    "oldest": stats.oldest.isoformat() if stats.oldest else None,
+                    "newest": stats.newest.isoformat() if stats.newest else None
+                }))
+        except Exception as e:
+            logger.warning(f"Failed to write metadata for {self.current_file}: {e}")
+
+    def _new_compressor(self):
+        """
+        Create a streaming compressor for the current file
+
+        One compressor is kept per file so the compression window carries
+        over between batches instead of restarting for every batch.
+        """
+        if self.compression == "gzip":
+            return zlib.compressobj(wbits=GZIP_WBITS)
+        elif self.compression == "zstd":
+            import zstandard
+
+            return zstandard.ZstdCompressor(level=3).compressobj()
+
+        return None
+
     def _get_extension(self) -> str:
         """Get file extension based on format and compression"""
         ext = self.file_format
@@ -67,62 +315,185 @@ class FilesystemStorage(StorageBackend):
         return await self.store_batch([message])
 
     async def store_batch(self, messages: List[Dict[str, Any]]) -> bool:
-        """Store multiple messages"""
-        try:
-            # Check if file rotation is needed
-            if self.current_file_size >= self.max_file_size:
-                await self._create_new_file()
-
-            # Format messages
-            lines = []
-            for msg in messages:
-                line = self._format_message(msg)
-                lines.append(line)
-
-            data = "\n".join(lines) + "\n"
-
-            # Write to file
-            if self.compression == "gzip":
-                await self._write_compressed_gzip(data)
-            else:
-                await self._write_uncompressed(data)
+        """
+        Queue multiple messages for writing
+
+        Messages are encoded here and written by the background flusher,
+        so the caller does not wait for compression and disk I/O. Waits
+        when the write queue is full. Returns False while earlier batches
+        are failing to be written; the flusher keeps retrying those.
+        """
+        if self._queue is None or self._closed:
+            logger.error("Failed to store batch: storage is not open")
+            return False
 
-            self.current_file_size += len(data.encode())
+        if self._failed:
+            return False
 
-            logger.debug(f"Stored {len(messages)} messages to {self.current_file}")
+        if not messages:
             return True
 
+        try:
+            data = b"\n".join([self._format_message(msg) for msg in messages]) + b"\n"
         except Exception as e:
             logger.error(f"Failed to store batch: {e}")
             return False
 
-    def _format_message(self, message: Dict[str, Any]) -> str:
-        """Format message based on file format"""
+        pending = _PendingWrite(
+            data,
+            len(messages),
+            messages[0]["timestamp"],
+            messages[-1]["timestamp"]
+        )
+        await self._queue.put(pending)
+
+        # Numbered once queued, so numbers follow queue order even when
+        # several callers waited for space
+        self._queued_sequence += 1
+        pending.sequence = self._queued_sequence
+        return True
+
+    async def _flush_loop(self):
+        """Write queued batches, coalescing whatever is waiting into one write"""
+        while True:
+            if self._failed:
+                await asyncio.sleep(WRITE_RETRY_DELAY)
+                # Take everything queued; store_batch refuses new batches
+                # meanwhile, so this is bounded by the queue size
+                pending = self._failed
+                while not self._queue.empty():
+                    pending.append(self._queue.get_nowait())
+            else:
+                pending = [await self._queue.get()]
+                while len(pending) < FLUSH_MAX_BATCHES and not self._queue.empty():
+                    pending.append(self._queue.get_nowait())
+
+            try:
+                await self._write_pending(pending)
+                self._failed = []
+            except Exception as e:
+                count = sum(item.messages for item in pending)
+                logger.error(f"Failed to write {count} messages, retrying: {e}")
+                # The compressed stream may be cut mid-batch, so continue
+                # in a new file
+                self._write_failed = True
+                self._failed = pending
+
+            # Failed batches count as handled too, so readers never wait
+            # on a failing disk
+            async with self._handled:
+                self._handled_sequence = pending[-1].sequence
+                self._handled.notify_all()
+
+    async def _wait_written(self):
+        """Wait until the batches queued before this call have been handled"""
+        if self._handled is None:
+            return
+
+        sequence = self._queued_sequence
+        async with self._handled:
+            await self._handled.wait_for(lambda: self._handled_sequence >= sequence)
+
+    async def _write_pending(self, pending: List[_PendingWrite]):
+        """Write queued batches to the current file"""
+        # Check if file rotation is needed; files never span days so
+        # query can skip whole day directories
+        if (
+            self._write_failed
+            or self.current_file_size >= self.max_file_size
+            or date.today() != self._current_day
+        ):
+            await self._create_new_file()
+            self._write_failed = False
+
+        data = b"".join([item.data for item in pending])
+
+        # Write to file
+        if self.compression == "gzip":
+            written = await self._write_compressed_gzip(data)
+        elif self.compression == "zstd":
+            written = await self._write_compressed_zstd(data)
+        else:
+            written = await self._write_uncompressed(data)
+
+        self.current_file_size += len(data)
+
+        # Batches are queued in arrival order
+        stats = self._files.setdefault(self.current_file, _FileStats())
+        count = sum(item.messages for item in pending)
+        self._count_written(stats, count, written, pending[0].oldest, pending[-1].newest)
+
+        logger.debug(f"Stored {count} messages to {self.current_file}")
+
+    def _count_written(
+        self,
+        stats: _FileStats,
+        count: int,
+        written: int,
+        oldest: datetime,
+        newest: datetime
+    ):
+        """Add written messages to the running totals"""
+        stats.messages += count
+        stats.size_bytes += written
+        self._total_messages += count
+        self._total_size += written
+
+        if stats.oldest is None:
+            stats.oldest = oldest
+        if self._oldest is None:
+            self._oldest = oldest
+        stats.newest = newest
+        self._newest = newest
+
+    def _format_message(self, message: Dict[str, Any]) -> bytes:
+        """Format message as one encoded line based on file format"""
+        topic, payload, timestamp, received_at = message_fields(message)
+
         if self.file_format == "jsonl":
-            return json.dumps({
-                "topic": message["topic"],
-                "payload": message["payload"],
-                "timestamp": message["timestamp"].isoformat(),
-                "received_at": message["received_at"].isoformat()
+            return _json_dumps({
+                "topic": topic,
+                "payload": payload,
+                "timestamp": timestamp.isoformat(),
+                "received_at": received_at.isoformat()
             })
         elif self.file_format == "csv":
             # Simple CSV format
-            return f"{message['topic']},{message['timestamp'].isoformat()},{json.dumps(message['payload'])}"
+            return (
+                f"{topic},{timestamp.isoformat()},".encode()
+                + _json_dumps(payload)
+            )
         else:
             # JSON array format
-            return json.dumps(message)
+            return _json_dumps(dict(message))
+
+    async def _write_uncompressed(self, data: bytes):
+        """Write uncompressed data, returning the bytes written"""
+        await self._fh.write(data)
+        await self._fh.flush()
+        return len(data)
 
-    async def _write_uncompressed(self, data: str):
-        """Write uncompressed data"""
-        async with aiofiles.open(self.current_file, 'a') as f:
-            await f.write(data)
+    async def _write_compressed_gzip(self, data: bytes):
+        """Write gzip compressed data, returning the bytes written"""
+        # Sync flush ends the batch on a byte boundary so readers can
+        # decompress everything written so far
+        compressed = self._compressor.compress(data)
+        compressed += self._compressor.flush(zlib.Z_SYNC_FLUSH)
 
-    async def _write_compressed_gzip(self, data: str):
-        """Write gzip compressed data"""
-        compressed = gzip.compress(data.encode())
+        await self._fh.write(compressed)
+        await self._fh.flush()
+        return len(compressed)
 
-        async with aiofiles.open(self.current_file, 'ab') as f:
-            await f.write(compressed)
+    async def _write_compressed_zstd(self, data: bytes):
+        """Write zstd compressed data, returning the bytes written"""
+        import zstandard
+
+        compressed = self._compressor.compress(data)
+        compressed += self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+        await self._fh.write(compressed)
+        await self._fh.flush()
+        return len(compressed)
 
     async def query(
         self,
@@ -132,72 +503,195 @@ class FilesystemStorage(StorageBackend):
         limit: int = 1000
     ) -> List[Dict[str, Any]]:
         """Query messages from files"""
+        # Include batches queued before this call
+        await self._wait_written()
+
         messages = []
+        loop = asyncio.get_running_loop()
 
-        # Read all .jsonl files
-        for file_path in sorted(self.base_path.glob("*.jsonl*"), reverse=True):
+        for file_path in self._query_files(start_time, end_time):
             try:
-                if file_path.suffix == ".gz":
-                    async with aiofiles.open(file_path, 'rb') as f:
-                        data = await f.read()
-                        content = gzip.decompress(data).decode()
-                else:
-                    async with aiofiles.open(file_path, 'r') as f:
-                        content = await f.read()
-
-                for line in content.strip().split('\n'):
-                    if not line:
-                        continue
-
-                    msg = json.loads(line)
-
-                    # Apply filters
-                    if topic and msg.get("topic") != topic:
-                        continue
+                await loop.run_in_executor(
+                    None,
+                    self._scan_file,
+                    file_path,
+                    messages,
+                    topic,
+                    start_time,
+                    end_time,
+                    limit
+                )
+            except Exception as e:
+                logger.error(f"Error reading file {file_path}: {e}")
 
-                    msg_time = datetime.fromisoformat(msg["timestamp"])
+            if len(messages) >= limit:
+                break
 
-                    if start_time and msg_time < start_time:
-                        continue
+        return messages
 
-                    if end_time and msg_time > end_time:
-                        continue
+    def _day_dirs(self) -> List[Tuple[date, Path]]:
+        """Get day directories, newest first"""
+        days = []
+        for path in self.base_path.glob("[0-9]*/[0-9]*/[0-9]*"):
+            try:
+                day = datetime.strptime("/".join(path.parts[-3:]), DAY_DIR_FORMAT)
+            except ValueError:
+                continue
 
-                    messages.append(msg)
+            if path.is_dir():
+                days.append((day.date(), path))
 
-                    if len(messages) >= limit:
-                        return messages
+        return sorted(days, reverse=True)
 
-            except Exception as e:
-                logger.error(f"Error reading file {file_path}: {e}")
-
-        return messages
+    def _query_files(
+        self,
+        start_time: Optional[datetime],
+        end_time: Optional[datetime]
+    ) -> List[Path]:
+        """Get .jsonl files that may hold messages in the time range, newest first"""
+        files = []
+        for day, path in self._day_dirs():
+            if start_time and day < start_time.date():
+                continue
+
+            # Messages buffered over midnight land in the next day's files
+            if end_time and day > end_time.date() + timedelta(days=1):
+                continue
+
+            files.extend(sorted(path.glob("*.jsonl*"), reverse=True))
+
+        # Files written before the day directory layout
+        files.extend(sorted(self.base_path.glob("*.jsonl*"), reverse=True))
+
+        return files
+
+    @staticmethod
+    def _scan_file(
+        file_path: Path,
+        messages: List[Dict[str, Any]],
+        topic: Optional[str],
+        start_time: Optional[datetime],
+        end_time: Optional[datetime],
+        limit: int
+    ):
+        """
+        Append matching messages from one file until limit is reached
+
+        Blocking; query runs it in the default executor.
+        """
+        needles = _topic_needles(topic) if topic else ()
+
+        for line in _iter_file_lines(file_path):
+            if not line or line.isspace():
+                continue
+
+            # Skip parsing lines that cannot match the topic
+            if needles and not any(needle in line for needle in needles):
+                continue
+
+            msg = _json_loads(line)
+
+            # Apply filters
+            if topic and msg.get("topic") != topic:
+                continue
+
+            msg_time = datetime.fromisoformat(msg["timestamp"])
+
+            if start_time and msg_time < start_time:
+                continue
+
+            if end_time and msg_time > end_time:
+                continue
+
+            messages.append(msg)
+
+            if len(messages) >= limit:
+                return
+
+    def _scan_files(self) -> Dict[Path, _FileStats]:
+        """
+        Get the stats of existing files
+
+        Walks the tree with os.scandir, whose entries carry file type and
+        size from the directory listing, so no extra stat() per file is
+        needed. Blocking; initialize runs it in the default executor.
+        """
+        files = {}
+        pending = [self.base_path]
+
+        while pending:
+            directory = pending.pop()
+            with os.scandir(directory) as it:
+                entries = list(it)
+            names = {entry.name for entry in entries}
+
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(Path(entry.path))
+                elif (
+                    entry.is_file(follow_symlinks=False)
+                    and not entry.name.endswith(META_SUFFIX)
+                ):
+                    file_path = Path(entry.path)
+                    has_meta = _meta_path(file_path).name in names
+                    try:
+                        files[file_path] = self._read_file_stats(
+                            file_path,
+                            entry.stat(follow_symlinks=False).st_size,
+                            has_meta
+                        )
+                    except Exception as e:
+                        logger.warning(f"Could not read stats of {file_path}: {e}")
+
+        return files
+
+    @staticmethod
+    def _read_file_stats(file_path: Path, size: int, has_meta: bool) -> _FileStats:
+        """
+        Get the stats of a finished file
+
+        Read from the sidecar when present, otherwise by counting lines
+        (files from older versions, or left open by a crash).
+        """
+        stats = _FileStats(size_bytes=size)
+
+        if has_meta:
+            meta_path = _meta_path(file_path)
+            meta = _json_loads(meta_path.read_bytes())
+            stats.messages = meta["messages"]
+            stats.oldest = _parse_time(meta["oldest"])
+            stats.newest = _parse_time(meta["newest"])
+            return stats
+
+        first = last = None
+        for line in _iter_file_lines(file_path):
+            if line and not line.isspace():
+                stats.messages += 1
+                first = first or line
+                last = line
+
+        if first and ".jsonl" in file_path.suffixes:
+            stats.oldest = datetime.fromisoformat(_json_loads(first)["timestamp"])
+            stats.newest = datetime.fromisoformat(_json_loads(last)["timestamp"])
+
+        return stats
+
+    def _update_totals(self):
+        """Recompute the running totals from the per-file stats"""
+        self._total_messages = sum(stats.messages for stats in self._files.values())
+        self._total_size = sum(stats.size_bytes for stats in self._files.values())
+
+        oldest = [stats.oldest for stats in self._files.values() if stats.oldest]
+        newest = [stats.newest for stats in self._files.values() if stats.newest]
+        self._oldest = min(oldest) if oldest else None
+        self._newest = max(newest) if newest else None
 
     async def get_info(self) -> StorageInfo:
-        """Get storage info"""
-        total_messages = 0
-        total_size = 0
-        oldest = None
-        newest = None
-
-        # Scan all files
-        for file_path in self.base_path.glob("*"):
-            if file_path.is_file():
-                total_size += file_path.stat().st_size
-
-                # Count messages (approximate for compressed files)
-                try:
-                    if file_path.suffix == ".jsonl":
-                        async with aiofiles.open(file_path, 'r') as f:
-                            content = await f.read()
-                            lines = content.count('\n')
-                            total_messages += lines
-
-                except Exception:
-                    pass
+        """Get storage info from the running totals"""
+        # Include batches queued before this call
+        await self._wait_written()
 
         # Get free space
-        import shutil
         stat = shutil.disk_usage(self.base_path)
         free_space = stat.free
         total_space = stat.total
@@ -205,27 +699,69 @@ class FilesystemStorage(StorageBackend):
 
         return StorageInfo(
             backend_type="filesystem",
-            total_messages=total_messages,
-            total_size_bytes=total_size,
+            total_messages=self._total_messages,
+            total_size_bytes=self._total_size,
             free_space_bytes=free_space,
             free_space_percent=free_percent,
-            oldest_message=oldest,
-            newest_message=newest
+            oldest_message=self._oldest,
+            newest_message=self._newest
         )
 
     async def cleanup(self, before: datetime) -> int:
         """Delete old files"""
         deleted = 0
 
-        for file_path in self.base_path.glob("*"):
-            if file_path.is_file():
+        for day, path in self._day_dirs():
+            # The day of the file still being written is pruned file by
+            # file, so that file is kept
+            holds_current = (
+                self.current_file is not None
+                and self.current_file.parent == path
+            )
+
+            if day < before.date() and not holds_current:
+                # Whole day is older than the cutoff
+                for file_path in path.iterdir():
+                    if file_path.is_file() and file_path.suffix != META_SUFFIX:
+                        self._files.pop(file_path, None)
+                        deleted += 1
+
+                shutil.rmtree(path)
+                logger.info(f"Deleted old directory: {path}")
+
+                # Remove month and year directories left empty
+                for parent in (path.parent, path.parent.parent):
+                    try:
+                        parent.rmdir()
+                    except OSError:
+                        break
+
+            elif day <= before.date():
+                deleted += self._delete_files_before(path, before)
+
+        # Files written before the day directory layout
+        deleted += self._delete_files_before(self.base_path, before)
+
+        if deleted:
+            self._update_totals()
+
+        return deleted
+
+    def _delete_files_before(self, directory: Path, before: datetime) -> int:
+        """Delete files in directory created before timestamp, except the current file"""
+        deleted = 0
+
+        for file_path in directory.glob("*"):
+            if file_path == self.current_file:
+                continue
+
+            if file_path.is_file() and file_path.suffix != META_SUFFIX:
                 # Get file timestamp from name
                 try:
-                    timestamp_str = file_path.stem.split('_', 1)[1]
-                    file_time = datetime.strptime(timestamp_str, "%Y%m%d_%H%M%S")
-
-                    if file_time < before:
+                    if _file_time(file_path) < before:
                         file_path.unlink()
+                        _meta_path(file_path).unlink(missing_ok=True)
+                        self._files.pop(file_path, None)
                         deleted += 1
                         logger.info(f"Deleted old file: {file_path}")
 
@@ -236,4 +772,24 @@ class FilesystemStorage(StorageBackend):
 
     async def close(self):
         """Close storage"""
+        self._closed = True
+
+        if self._flusher_task:
+            # Write everything still queued before stopping the flusher
+            await self._wait_written()
+            self._flusher_task.cancel()
+            try:
+                await self._flusher_task
+            except asyncio.CancelledError:
+                pass
+            self._flusher_task = None
+            self._queue = None
+
+            if self._failed:
+                count = sum(item.messages for item in self._failed)
+                logger.error(f"Dropped {count} messages that could not be written")
+                self._failed = []
+
+        await self._close_file()
+
         logger.info("Filesystem storage closed")
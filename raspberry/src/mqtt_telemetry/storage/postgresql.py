@@ -4,14 +4,98 @@ PostgreSQL storage backend
 
 import asyncpg
 import json
-from typing import List, Dict, Any, Optional
-from datetime import datetime
+from typing import List, Dict, Any, Optional, Set, Iterable
+from datetime import date, datetime, time, timedelta, timezone
 import logging
 
 from .base import StorageBackend, StorageInfo
+from ..message import message_fields
+
+try:
+    import orjson
+    _json_dumps = orjson.dumps
+    _json_loads = orjson.loads
+except ImportError:
+    def _json_dumps(obj: Any) -> bytes:
+        return json.dumps(obj).encode()
+
+    _json_loads = json.loads
 
 logger = logging.getLogger(__name__)
 
+# Columns written by store_batch, in record order (as given by message_fields)
+MESSAGE_COLUMNS = ("topic", "payload", "timestamp", "received_at")
+
+INSERT_MESSAGE_SQL = """
+    INSERT INTO messages (topic, payload, timestamp, received_at)
+    VALUES ($1, $2, $3, $4)
+"""
+
+# Version byte prefixed to JSONB values in the binary wire format
+JSONB_FORMAT_VERSION = b"\x01"
+
+# Daily partitions of the messages table are named after their UTC day
+PARTITION_NAME_FORMAT = "messages_%Y%m%d"
+
+# Maximum rows sent per COPY, to bound memory on very large batches
+COPY_CHUNK_SIZE = 10000
+
+# Query filter flags; each combination has its own fixed SQL text so
+# asyncpg's per-connection statement cache reuses the prepared plan
+QUERY_BY_TOPIC = 1
+QUERY_BY_START = 2
+QUERY_BY_END = 4
+
+_QUERY_CONDITIONS = (
+    (QUERY_BY_TOPIC, "topic = ${}"),
+    (QUERY_BY_START, "timestamp >= ${}"),
+    (QUERY_BY_END, "timestamp <= ${}"),
+)
+
+
+def _build_query_sql(shape: int) -> str:
+    """Build the query SQL for a combination of filter flags"""
+    conditions = []
+    param_count = 1
+
+    for flag, condition in _QUERY_CONDITIONS:
+        if shape & flag:
+            conditions.append(condition.format(param_count))
+            param_count += 1
+
+    where_clause = " AND ".join(conditions) if conditions else "TRUE"
+    return f"""
+        SELECT topic, payload, timestamp, received_at
+        FROM messages
+        WHERE {where_clause}
+        ORDER BY timestamp DESC
+        LIMIT ${param_count}
+    """
+
+
+QUERY_SQL = {shape: _build_query_sql(shape) for shape in range(8)}
+
+
+def _encode_jsonb(value: Any) -> bytes:
+    """Encode a payload as binary JSONB"""
+    return JSONB_FORMAT_VERSION + _json_dumps(value)
+
+
+def _decode_jsonb(data: bytes) -> Any:
+    """Decode a binary JSONB payload"""
+    return _json_loads(data[1:])
+
+
+async def _init_connection(conn: asyncpg.Connection):
+    """Register the JSONB codec so payloads are passed as Python objects"""
+    await conn.set_type_codec(
+        "jsonb",
+        encoder=_encode_jsonb,
+        decoder=_decode_jsonb,
+        schema="pg_catalog",
+        format="binary"
+    )
+
 
 class PostgreSQLStorage(StorageBackend):
     """PostgreSQL storage backend"""
@@ -19,6 +103,8 @@ class PostgreSQLStorage(StorageBackend):
     def __init__(self, config: Dict[str, Any]):
         super().__init__(config)
         self.pool: Optional[asyncpg.Pool] = None
+        self._partitioned = False
+        self._partitions: Set[date] = set()
 
     async def initialize(self):
         """Initialize PostgreSQL connection pool"""
@@ -31,7 +117,8 @@ class PostgreSQLStorage(StorageBackend):
             user=pg_config.get("username", "postgres"),
             password=pg_config.get("password", ""),
             min_size=1,
-            max_size=pg_config.get("pool_size", 10)
+            max_size=pg_config.get("pool_size", 10),
+            init=_init_connection
         )
 
         # Create tables
@@ -41,49 +128,120 @@ class PostgreSQLStorage(StorageBackend):
 
     async def _create_tables(self):
         """Create database tables"""
+        pg_config = self.config.get("postgresql", {})
+        partitioning = pg_config.get("partitioning", "daily")
+
         async with self.pool.acquire() as conn:
-            # Create messages table
-            await conn.execute("""
-                CREATE TABLE IF NOT EXISTS messages (
-                    id BIGSERIAL PRIMARY KEY,
-                    topic TEXT NOT NULL,
-                    payload JSONB NOT NULL,
-                    timestamp TIMESTAMPTZ NOT NULL,
-                    received_at TIMESTAMPTZ NOT NULL,
-                    created_at TIMESTAMPTZ DEFAULT NOW()
-                )
-            """)
+            # Create messages table. With daily partitioning, cleanup can
+            # drop whole days instead of deleting row by row
+            if partitioning == "daily":
+                await conn.execute("""
+                    CREATE TABLE IF NOT EXISTS messages (
+                        id BIGSERIAL,
+                        topic TEXT NOT NULL,
+                        payload JSONB NOT NULL,
+                        timestamp TIMESTAMPTZ NOT NULL,
+                        received_at TIMESTAMPTZ NOT NULL,
+                        created_at TIMESTAMPTZ DEFAULT NOW(),
+                        PRIMARY KEY (id, timestamp)
+                    ) PARTITION BY RANGE (timestamp)
+                """)
+            else:
+                await conn.execute("""
+                    CREATE TABLE IF NOT EXISTS messages (
+                        id BIGSERIAL PRIMARY KEY,
+                        topic TEXT NOT NULL,
+                        payload JSONB NOT NULL,
+                        timestamp TIMESTAMPTZ NOT NULL,
+                        received_at TIMESTAMPTZ NOT NULL,
+                        created_at TIMESTAMPTZ DEFAULT NOW()
+                    )
+                """)
+
+            # An existing table keeps the layout it was created with
+            self._partitioned = await conn.fetchval(
+                "SELECT relkind = 'p' FROM pg_class WHERE oid = 'messages'::regclass"
+            )
 
-            # Create indexes
-            await conn.execute("""
-                CREATE INDEX IF NOT EXISTS idx_messages_topic
-                ON messages(topic)
+            if self._partitioned:
+                rows = await conn.fetch("""
+                    SELECT c.relname
+                    FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+                    WHERE i.inhparent = 'messages'::regclass
+                """)
+                self._partitions = set()
+                for row in rows:
+                    # Partitions not created by this backend (for example a
+                    # default partition) are left alone
+                    try:
+                        day = datetime.strptime(row["relname"], PARTITION_NAME_FORMAT)
+                    except ValueError:
+                        continue
+                    self._partitions.add(day.date())
+
+            # Create indexes. The timestamp B-tree serves time ranges and
+            # the latest rows overall (ORDER BY timestamp DESC LIMIT n, which
+            # BRIN can't), and (topic, timestamp DESC) serves the latest rows
+            # per topic. Building CONCURRENTLY keeps an existing table
+            # writable; partitioned tables don't support it
+            concurrently = "" if self._partitioned else "CONCURRENTLY"
+
+            await conn.execute(f"""
+                CREATE INDEX {concurrently} IF NOT EXISTS idx_messages_timestamp
+                ON messages (timestamp)
             """)
 
-            await conn.execute("""
-                CREATE INDEX IF NOT EXISTS idx_messages_timestamp
-                ON messages(timestamp)
+            await conn.execute(f"""
+                CREATE INDEX {concurrently} IF NOT EXISTS idx_messages_topic_timestamp
+                ON messages (topic, timestamp DESC)
             """)
 
+            # Drop indexes made redundant by the ones above: the topic index
+            # of older databases, and a BRIN index on timestamp that the
+            # planner never picks over the B-tree but every insert updates
+            for index in ("idx_messages_topic", "idx_messages_timestamp_brin"):
+                await conn.execute(f"DROP INDEX {concurrently} IF EXISTS {index}")
+
             # Create index on JSONB payload for faster queries
             await conn.execute("""
                 CREATE INDEX IF NOT EXISTS idx_messages_payload
                 ON messages USING GIN (payload)
             """)
 
+    async def _ensure_partitions(
+        self,
+        conn: asyncpg.Connection,
+        timestamps: Iterable[datetime]
+    ):
+        """Create missing daily partitions for the given timestamps"""
+        # asyncpg treats naive datetimes as local time, as astimezone does
+        days = {ts.astimezone(timezone.utc).date() for ts in timestamps}
+
+        for day in sorted(days - self._partitions):
+            start = datetime.combine(day, time(), timezone.utc)
+            end = start + timedelta(days=1)
+            await conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS {day.strftime(PARTITION_NAME_FORMAT)}
+                PARTITION OF messages
+                FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')
+            """)
+            self._partitions.add(day)
+
     async def store_message(self, message: Dict[str, Any]) -> bool:
         """Store single message"""
         try:
+            topic, payload, timestamp, received_at = message_fields(message)
+
             async with self.pool.acquire() as conn:
+                if self._partitioned:
+                    await self._ensure_partitions(conn, [timestamp])
+
                 await conn.execute(
-                    """
-                    INSERT INTO messages (topic, payload, timestamp, received_at)
-                    VALUES ($1, $2, $3, $4)
-                    """,
-                    message["topic"],
-                    json.dumps(message["payload"]),
-                    message["timestamp"],
-                    message["received_at"]
+                    INSERT_MESSAGE_SQL,
+                    topic,
+                    payload,
+                    timestamp,
+                    received_at
                 )
 
             return True
@@ -93,24 +251,21 @@ class PostgreSQLStorage(StorageBackend):
             return False
 
     async def store_batch(self, messages: List[Dict[str, Any]]) -> bool:
-        """Store multiple messages"""
+        """Store multiple messages using COPY"""
         try:
+            records = [message_fields(msg) for msg in messages]
+
             async with self.pool.acquire() as conn:
-                await conn.executemany(
-                    """
-                    INSERT INTO messages (topic, payload, timestamp, received_at)
-                    VALUES ($1, $2, $3, $4)
-                    """,
-                    [
-                        (
-                            msg["topic"],
-                            json.dumps(msg["payload"]),
-                            msg["timestamp"],
-                            msg["received_at"]
+                if self._partitioned:
+                    await self._ensure_partitions(conn, (record[2] for record in records))
+
+                async with conn.transaction():
+                    for start in range(0, len(records), COPY_CHUNK_SIZE):
+                        await conn.copy_records_to_table(
+                            "messages",
+                            records=records[start:start + COPY_CHUNK_SIZE],
+                            columns=MESSAGE_COLUMNS
                         )
-                        for msg in messages
-                    ]
-                )
 
             logger.debug(f"Stored batch of {len(messages)} messages")
             return True
@@ -127,48 +282,28 @@ class PostgreSQLStorage(StorageBackend):
         limit: int = 1000
     ) -> List[Dict[str, Any]]:
         """Query messages"""
-        conditions = []
+        shape = 0
         params = []
-        param_count = 1
 
         if topic:
-            conditions.append(f"topic = ${param_count}")
+            shape |= QUERY_BY_TOPIC
             params.append(topic)
-            param_count += 1
 
         if start_time:
-            conditions.append(f"timestamp >= ${param_count}")
+            shape |= QUERY_BY_START
             params.append(start_time)
-            param_count += 1
 
         if end_time:
-            conditions.append(f"timestamp <= ${param_count}")
+            shape |= QUERY_BY_END
             params.append(end_time)
-            param_count += 1
 
-        where_clause = " AND ".join(conditions) if conditions else "TRUE"
-        query = f"""
-            SELECT topic, payload, timestamp, received_at
-            FROM messages
-            WHERE {where_clause}
-            ORDER BY timestamp DESC
-            LIMIT ${param_count}
-        """
         params.append(limit)
 
         async with self.pool.acquire() as conn:
-            rows = await conn.fetch(query, *params)
+            rows = await conn.fetch(QUERY_SQL[shape], *params)
 
-            messages = []
-            for row in rows:
-                messages.append({
-                    "topic": row["topic"],
-                    "payload": json.loads(row["payload"]),
-                    "timestamp": row["timestamp"],
-                    "received_at": row["received_at"]
-                })
-
-            return messages
+        # Payloads are already decoded by the JSONB codec
+        return [dict(row) for row in rows]
 
     async def get_info(self) -> StorageInfo:
         """Get storage info"""
@@ -181,33 +316,71 @@ class PostgreSQLStorage(StorageBackend):
                 "SELECT MIN(timestamp) as oldest, MAX(timestamp) as newest FROM messages"
             )
 
-            # Get table size
+            # Get table size, including partitions
             size = await conn.fetchval("""
-                SELECT pg_total_relation_size('messages')
+                SELECT pg_total_relation_size('messages') + COALESCE((
+                    SELECT SUM(pg_total_relation_size(inhrelid))
+                    FROM pg_inherits
+                    WHERE inhparent = 'messages'::regclass
+                ), 0)
             """)
 
         return StorageInfo(
             backend_type="postgresql",
             total_messages=total or 0,
-            total_size_bytes=size or 0,
+            total_size_bytes=int(size or 0),
             oldest_message=time_range["oldest"] if time_range else None,
             newest_message=time_range["newest"] if time_range else None
         )
 
     async def cleanup(self, before: datetime) -> int:
         """Delete messages before timestamp"""
+        deleted = 0
+
         async with self.pool.acquire() as conn:
+            if self._partitioned:
+                deleted += await self._drop_partitions(conn, before)
+
+            # Delete the remaining rows; with partitioning this only
+            # touches the partition containing the cutoff
             result = await conn.execute(
                 "DELETE FROM messages WHERE timestamp < $1",
                 before
             )
 
             # Extract number of deleted rows
-            deleted = int(result.split()[-1]) if result else 0
+            deleted += int(result.split()[-1]) if result else 0
 
             logger.info(f"Cleaned up {deleted} messages before {before}")
             return deleted
 
+    async def _drop_partitions(self, conn: asyncpg.Connection, before: datetime) -> int:
+        """
+        Drop daily partitions that end before timestamp
+
+        Returns the planner's row estimate (pg_class.reltuples) of the
+        dropped partitions; counting their rows exactly would scan them.
+        """
+        cutoff = before.astimezone(timezone.utc)
+        deleted = 0
+
+        for day in sorted(self._partitions):
+            if datetime.combine(day + timedelta(days=1), time(), timezone.utc) > cutoff:
+                break
+
+            name = day.strftime(PARTITION_NAME_FORMAT)
+            async with conn.transaction():
+                deleted += await conn.fetchval(
+                    "SELECT GREATEST(reltuples, 0)::bigint FROM pg_class WHERE oid = to_regclass($1)",
+                    name
+                ) or 0
+                await conn.execute(f"DROP TABLE IF EXISTS {name}")
+
+            self._partitions.discard(day)
+            logger.info(f"Dropped partition {name}")
+
+        return deleted
+
     async def close(self):
         """Close connection pool"""
         if self.pool:
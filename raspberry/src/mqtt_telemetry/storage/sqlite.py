@@ -2,26 +2,162 @@
 SQLite storage backend
 """
 
+import asyncio
 import aiosqlite
 import json
-from typing import List, Dict, Any, Optional
+import shutil
+import time
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, AsyncIterator, Tuple
 from datetime import datetime
 from pathlib import Path
 import logging
 
 from .base import StorageBackend, StorageInfo
+from ..message import message_fields
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+
+    def _json_dumps(obj: Any) -> str:
+        return orjson.dumps(obj).decode()
+except ImportError:
+    _json_dumps = json.dumps
+    _json_loads = json.loads
 
 logger = logging.getLogger(__name__)
 
+# Payload encodings selectable with storage.sqlite.payload_format
+PAYLOAD_FORMATS = ("json", "msgpack")
+
+# Tuning PRAGMAs applied at startup, each overridable under storage.sqlite
+PRAGMA_DEFAULTS = {
+    "temp_store": "MEMORY",
+    "cache_size": -64000,  # negative means KiB, about 64 MB
+    "mmap_size": 268435456,  # 256 MB
+    "busy_timeout": 5000,  # ms
+}
+
+# Page cache of each read-only connection, overridable with
+# storage.sqlite.read_cache_size. Kept well below the writer's cache, since
+# every reader holds its own; memory-mapped pages are shared between them
+READ_CACHE_SIZE = -8000  # about 8 MB
+
+INSERT_MESSAGE_SQL = """
+    INSERT INTO messages (topic, payload, timestamp, received_at)
+    VALUES (?, ?, ?, ?)
+"""
+
+# Seconds get_info results are reused before querying again
+INFO_CACHE_TTL = 2.0
+
+# Seconds the flusher waits before retrying rows it failed to commit
+FLUSH_RETRY_DELAY = 1.0
+
+# Seconds between ANALYZE runs keeping the query planner statistics fresh
+ANALYZE_INTERVAL = 24 * 60 * 60
+
+# Cleanups deleting at least this many rows also truncate the WAL file
+# and let SQLite re-optimize, since the freed pages change the statistics
+CLEANUP_MAINTENANCE_ROWS = 10000
+
+# Query filter flags; each combination has its own fixed SQL text so the
+# sqlite3 statement cache reuses the compiled statement
+QUERY_BY_TOPIC = 1
+QUERY_BY_START = 2
+QUERY_BY_END = 4
+
+_QUERY_CONDITIONS = (
+    (QUERY_BY_TOPIC, " AND topic = ?"),
+    (QUERY_BY_START, " AND timestamp >= ?"),
+    (QUERY_BY_END, " AND timestamp <= ?"),
+)
+
+
+def _build_query_sql(shape: int) -> str:
+    """Build the query SQL for a combination of filter flags"""
+    query = "SELECT topic, payload, timestamp, received_at FROM messages WHERE 1=1"
+
+    for flag, condition in _QUERY_CONDITIONS:
+        if shape & flag:
+            query += condition
+
+    return query + " ORDER BY timestamp DESC LIMIT ?"
+
+
+QUERY_SQL = {shape: _build_query_sql(shape) for shape in range(8)}
+
+
+@lru_cache(maxsize=None)
+def _msgpack():
+    """Get the MessagePack encoder and decoder, importing msgspec on first use"""
+    import msgspec
+
+    return msgspec.msgpack.Encoder(), msgspec.msgpack.Decoder()
+
+
+def _decode_payload(value: Any) -> Any:
+    """Decode a stored payload written as JSON text or MessagePack bytes"""
+    if isinstance(value, bytes):
+        return _msgpack()[1].decode(value)
+    return _json_loads(value)
+
+
+def _row_to_message(row: tuple) -> Dict[str, Any]:
+    """Convert a query row to a message dictionary"""
+    return {
+        "topic": row[0],
+        "payload": _decode_payload(row[1]),
+        "timestamp": row[2],
+        "received_at": row[3]
+    }
+
 
 class SQLiteStorage(StorageBackend):
     """SQLite storage backend"""
 
     def __init__(self, config: Dict[str, Any]):
         super().__init__(config)
-        self.db_path = config.get("sqlite", {}).get("path", "/tmp/telemetry.db")
+        sqlite_config = config.get("sqlite", {})
+        self.db_path = sqlite_config.get("path", "/tmp/telemetry.db")
         self.db: Optional[aiosqlite.Connection] = None
 
+        # MessagePack payloads are stored as BLOBs in the same column;
+        # SQLite keeps blobs as-is, so both formats can coexist
+        payload_format = sqlite_config.get("payload_format", "json")
+        if payload_format not in PAYLOAD_FORMATS:
+            raise ValueError(f"Unknown SQLite payload format: {payload_format}")
+        self._encode_payload = (
+            _msgpack()[0].encode if payload_format == "msgpack" else _json_dumps
+        )
+
+        # Read-only connections for query and get_info; in WAL mode they
+        # read concurrently with the writer connection self.db. An
+        # in-memory database or a pool size below 1 reads through self.db
+        self.read_pool_size = sqlite_config.get("read_pool_size", 2)
+        self._readers: Optional[asyncio.Queue] = None
+
+        # Single messages are committed in groups by a background task
+        self.commit_batch_size = sqlite_config.get("commit_batch_size", 100)
+        self.commit_interval = sqlite_config.get("commit_interval_ms", 100) / 1000
+        self._pending: List[tuple] = []
+        self._flush_event: Optional[asyncio.Event] = None
+        self._flusher: Optional[asyncio.Task] = None
+        self._closing = False
+        self._flush_failing = False
+
+        # Serializes transactions on the writer connection, so VACUUM never
+        # runs while a flush or cleanup has a transaction open
+        self._write_lock = asyncio.Lock()
+        self._last_analyze = time.monotonic()
+
+        # Row count kept up to date by writes, and the last get_info result
+        self._message_count = 0
+        self._info_cache: Optional[StorageInfo] = None
+        self._info_cache_time = 0.0
+
     async def initialize(self):
         """Initialize SQLite database"""
         # Ensure directory exists
@@ -30,6 +166,23 @@ class SQLiteStorage(StorageBackend):
         # Open database
         self.db = await aiosqlite.connect(self.db_path)
 
+        try:
+            await self._setup_connections()
+        except Exception:
+            # Open connections would keep their threads, and the process, alive
+            await self._close_readers()
+            await self.db.close()
+            self.db = None
+            raise
+
+        # Start committing queued single messages
+        self._flush_event = asyncio.Event()
+        self._flusher = asyncio.create_task(self._flush_loop())
+
+        logger.info(f"SQLite storage initialized: {self.db_path}")
+
+    async def _setup_connections(self):
+        """Configure the writer connection, create the schema and open readers"""
         # Set journal mode
         journal_mode = self.config.get("sqlite", {}).get("journal_mode", "WAL")
         await self.db.execute(f"PRAGMA journal_mode={journal_mode}")
@@ -38,10 +191,73 @@ class SQLiteStorage(StorageBackend):
         sync_mode = self.config.get("sqlite", {}).get("synchronous", "NORMAL")
         await self.db.execute(f"PRAGMA synchronous={sync_mode}")
 
+        await self._apply_pragmas(self.db)
+
+        if journal_mode.upper() == "WAL":
+            checkpoint = self.config.get("sqlite", {}).get("wal_autocheckpoint", 1000)
+            await self.db.execute(f"PRAGMA wal_autocheckpoint={checkpoint}")
+
         # Create tables
         await self._create_tables()
 
-        logger.info(f"SQLite storage initialized: {self.db_path}")
+        # Count existing rows once; writes keep the count up to date
+        async with self.db.execute("SELECT COUNT(*) FROM messages") as cursor:
+            row = await cursor.fetchone()
+            self._message_count = row[0] if row else 0
+
+        # Open readers once the database file and schema exist
+        if self.db_path != ":memory:" and self.read_pool_size >= 1:
+            await self._open_readers()
+
+    async def _apply_pragmas(self, db: aiosqlite.Connection, read_only: bool = False):
+        """Set cache, memory-mapping and locking behaviour of a connection"""
+        sqlite_config = self.config.get("sqlite", {})
+        pragmas = {
+            pragma: sqlite_config.get(pragma, default)
+            for pragma, default in PRAGMA_DEFAULTS.items()
+        }
+        if read_only:
+            pragmas["cache_size"] = sqlite_config.get("read_cache_size", READ_CACHE_SIZE)
+
+        for pragma, value in pragmas.items():
+            await db.execute(f"PRAGMA {pragma}={value}")
+
+    async def _open_readers(self):
+        """Open the pool of read-only connections"""
+        self._readers = asyncio.Queue()
+        for _ in range(self.read_pool_size):
+            self._readers.put_nowait(await self._connect_reader())
+
+    async def _connect_reader(self) -> aiosqlite.Connection:
+        """Open a read-only connection"""
+        read_uri = f"{Path(self.db_path).resolve().as_uri()}?mode=ro"
+        reader = await aiosqlite.connect(read_uri, uri=True)
+        try:
+            await self._apply_pragmas(reader, read_only=True)
+        except Exception:
+            await reader.close()
+            raise
+        return reader
+
+    async def _close_readers(self):
+        """Close the read-only connections"""
+        if self._readers:
+            while not self._readers.empty():
+                await self._readers.get_nowait().close()
+        self._readers = None
+
+    @asynccontextmanager
+    async def _acquire_reader(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Borrow a read-only connection, waiting if all are in use"""
+        if self._readers is None:
+            yield self.db
+            return
+
+        reader = await self._readers.get()
+        try:
+            yield reader
+        finally:
+            self._readers.put_nowait(reader)
 
     async def _create_tables(self):
         """Create database tables"""
@@ -56,64 +272,128 @@ class SQLiteStorage(StorageBackend):
             )
         """)
 
-        # Create indexes
+        # Create indexes. (topic, timestamp) serves topic queries with a
+        # time range and ordering in one index range scan, which makes the
+        # single-column topic index redundant
         await self.db.execute("""
-            CREATE INDEX IF NOT EXISTS idx_topic ON messages(topic)
+            CREATE INDEX IF NOT EXISTS idx_topic_timestamp
+            ON messages(topic, timestamp)
         """)
 
         await self.db.execute("""
             CREATE INDEX IF NOT EXISTS idx_timestamp ON messages(timestamp)
         """)
 
+        await self.db.execute("DROP INDEX IF EXISTS idx_topic")
+
         await self.db.commit()
 
     async def store_message(self, message: Dict[str, Any]) -> bool:
-        """Store single message"""
+        """
+        Queue single message
+
+        The row is written by the background flusher together with other
+        queued messages, so a commit is not paid for every message.
+        Returns False while queued rows are failing to be committed; the
+        flusher keeps retrying those.
+        """
+        if self._flush_failing:
+            return False
+
         try:
-            payload_json = json.dumps(message["payload"])
-
-            await self.db.execute(
-                """
-                INSERT INTO messages (topic, payload, timestamp, received_at)
-                VALUES (?, ?, ?, ?)
-                """,
-                (
-                    message["topic"],
-                    payload_json,
-                    message["timestamp"],
-                    message["received_at"]
-                )
+            topic, payload, timestamp, received_at = message_fields(message)
+            self._pending.append(
+                (topic, self._encode_payload(payload), timestamp, received_at)
             )
 
-            await self.db.commit()
+            # Wake the flusher for the first row, and again once a batch is full
+            if len(self._pending) == 1 or len(self._pending) >= self.commit_batch_size:
+                self._flush_event.set()
+
             return True
 
         except Exception as e:
             logger.error(f"Failed to store message: {e}")
             return False
 
+    async def _flush_loop(self):
+        """Commit queued messages every commit interval or when enough are queued"""
+        while True:
+            if not self._pending and not self._closing:
+                # Sleep without a timer until the first row is queued
+                await self._flush_event.wait()
+                self._flush_event.clear()
+
+            # Give more rows the commit interval to arrive, unless the
+            # batch is already full or the storage is closing
+            if len(self._pending) < self.commit_batch_size and not self._closing:
+                delay = FLUSH_RETRY_DELAY if self._flush_failing else self.commit_interval
+                try:
+                    await asyncio.wait_for(self._flush_event.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                self._flush_event.clear()
+
+            await self._flush_pending()
+
+            if self._closing:
+                return
+
+            if time.monotonic() - self._last_analyze >= ANALYZE_INTERVAL:
+                await self._analyze()
+
+    async def _analyze(self):
+        """Refresh the query planner statistics of the messages table"""
+        self._last_analyze = time.monotonic()
+
+        try:
+            async with self._write_lock:
+                await self.db.execute("ANALYZE messages")
+                await self.db.commit()
+            logger.debug("Analyzed messages table")
+
+        except Exception as e:
+            logger.error(f"Failed to analyze database: {e}")
+
+    async def _flush_pending(self):
+        """Write and commit queued messages, keeping them queued if that fails"""
+        if not self._pending:
+            return
+
+        rows, self._pending = self._pending, []
+
+        try:
+            async with self._write_lock:
+                try:
+                    await self.db.executemany(INSERT_MESSAGE_SQL, rows)
+                    await self.db.commit()
+                except Exception:
+                    await self.db.rollback()
+                    raise
+
+            self._message_count += len(rows)
+            self._flush_failing = False
+
+        except Exception as e:
+            logger.error(f"Failed to store {len(rows)} messages, retrying: {e}")
+            # Retry them ahead of anything queued meanwhile
+            self._pending[:0] = rows
+            self._flush_failing = True
+
     async def store_batch(self, messages: List[Dict[str, Any]]) -> bool:
         """Store multiple messages"""
         try:
+            encode = self._encode_payload
             data = [
-                (
-                    msg["topic"],
-                    json.dumps(msg["payload"]),
-                    msg["timestamp"],
-                    msg["received_at"]
-                )
-                for msg in messages
+                (topic, encode(payload), timestamp, received_at)
+                for topic, payload, timestamp, received_at in map(message_fields, messages)
             ]
 
-            await self.db.executemany(
-                """
-                INSERT INTO messages (topic, payload, timestamp, received_at)
-                VALUES (?, ?, ?, ?)
-                """,
-                data
-            )
+            async with self._write_lock:
+                await self.db.executemany(INSERT_MESSAGE_SQL, data)
+                await self.db.commit()
 
-            await self.db.commit()
+            self._message_count += len(data)
             logger.debug(f"Stored batch of {len(messages)} messages")
             return True
 
@@ -129,88 +409,168 @@ class SQLiteStorage(StorageBackend):
         limit: int = 1000
     ) -> List[Dict[str, Any]]:
         """Query messages"""
-        query = "SELECT topic, payload, timestamp, received_at FROM messages WHERE 1=1"
+        sql, params = await self._prepare_query(topic, start_time, end_time, limit)
+
+        async with self._acquire_reader() as db:
+            async with db.execute(sql, params) as cursor:
+                rows = await cursor.fetchall()
+
+        return [_row_to_message(row) for row in rows]
+
+    async def iter_query(
+        self,
+        topic: Optional[str] = None,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        limit: int = 1000
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Iterate over messages as they are read from the cursor
+
+        Only one cursor chunk is held in memory at a time. The cursor
+        reads on its own connection, closed when iteration finishes, so
+        an iterator left unfinished never holds a pooled reader.
+        """
+        sql, params = await self._prepare_query(topic, start_time, end_time, limit)
+
+        async with self._stream_reader() as db:
+            async with db.execute(sql, params) as cursor:
+                async for row in cursor:
+                    yield _row_to_message(row)
+
+    @asynccontextmanager
+    async def _stream_reader(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Open a connection for iter_query, or use the writer when there is no read pool"""
+        if self._readers is None:
+            yield self.db
+            return
+
+        reader = await self._connect_reader()
+        try:
+            yield reader
+        finally:
+            await reader.close()
+
+    async def _prepare_query(
+        self,
+        topic: Optional[str],
+        start_time: Optional[datetime],
+        end_time: Optional[datetime],
+        limit: int
+    ) -> Tuple[str, List[Any]]:
+        """Get the SQL and parameters for a query"""
+        # Include messages still waiting to be committed
+        await self._flush_pending()
+
+        shape = 0
         params = []
 
         if topic:
-            query += " AND topic = ?"
+            shape |= QUERY_BY_TOPIC
             params.append(topic)
 
         if start_time:
-            query += " AND timestamp >= ?"
+            shape |= QUERY_BY_START
             params.append(start_time)
 
         if end_time:
-            query += " AND timestamp <= ?"
+            shape |= QUERY_BY_END
             params.append(end_time)
 
-        query += " ORDER BY timestamp DESC LIMIT ?"
         params.append(limit)
 
-        async with self.db.execute(query, params) as cursor:
-            rows = await cursor.fetchall()
-
-            messages = []
-            for row in rows:
-                messages.append({
-                    "topic": row[0],
-                    "payload": json.loads(row[1]),
-                    "timestamp": row[2],
-                    "received_at": row[3]
-                })
-
-            return messages
+        return QUERY_SQL[shape], params
 
     async def get_info(self) -> StorageInfo:
-        """Get storage info"""
-        # Count messages
-        async with self.db.execute("SELECT COUNT(*) FROM messages") as cursor:
-            row = await cursor.fetchone()
-            total_messages = row[0] if row else 0
+        """Get storage info, reusing the last result for INFO_CACHE_TTL seconds"""
+        now = time.monotonic()
+        if self._info_cache and now - self._info_cache_time < INFO_CACHE_TTL:
+            return self._info_cache
+
+        await self._flush_pending()
+
+        async with self._acquire_reader() as db:
+            # Get time range
+            async with db.execute(
+                "SELECT MIN(timestamp), MAX(timestamp) FROM messages"
+            ) as cursor:
+                row = await cursor.fetchone()
+                oldest = row[0] if row and row[0] else None
+                newest = row[1] if row and row[1] else None
 
         # Get database size
         db_size = Path(self.db_path).stat().st_size if Path(self.db_path).exists() else 0
 
-        # Get time range
-        async with self.db.execute(
-            "SELECT MIN(timestamp), MAX(timestamp) FROM messages"
-        ) as cursor:
-            row = await cursor.fetchone()
-            oldest = row[0] if row and row[0] else None
-            newest = row[1] if row and row[1] else None
-
         # Get free space
-        import shutil
         stat = shutil.disk_usage(Path(self.db_path).parent)
         free_space = stat.free
         total_space = stat.total
         free_percent = (free_space / total_space * 100) if total_space > 0 else 0
 
-        return StorageInfo(
+        self._info_cache_time = now
+        self._info_cache = StorageInfo(
             backend_type="sqlite",
-            total_messages=total_messages,
+            total_messages=self._message_count,
             total_size_bytes=db_size,
             free_space_bytes=free_space,
             free_space_percent=free_percent,
             oldest_message=oldest,
             newest_message=newest
         )
+        return self._info_cache
 
     async def cleanup(self, before: datetime) -> int:
         """Delete messages before timestamp"""
-        cursor = await self.db.execute(
-            "DELETE FROM messages WHERE timestamp < ?",
-            (before,)
-        )
+        async with self._write_lock:
+            cursor = await self.db.execute(
+                "DELETE FROM messages WHERE timestamp < ?",
+                (before,)
+            )
 
-        deleted = cursor.rowcount
-        await self.db.commit()
+            deleted = cursor.rowcount
+            await self.db.commit()
+
+            if deleted >= CLEANUP_MAINTENANCE_ROWS:
+                await self.db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+                await self.db.execute("PRAGMA optimize")
+
+        self._message_count -= deleted
+        self._info_cache = None
 
         logger.info(f"Cleaned up {deleted} messages before {before}")
         return deleted
 
+    async def vacuum(self):
+        """
+        Rebuild the database file to return space freed by cleanup
+
+        VACUUM rewrites the whole file and blocks other writes while it
+        runs, so it is meant to be called rarely, e.g. after large cleanups.
+        """
+        await self._flush_pending()
+
+        async with self._write_lock:
+            await self.db.execute("VACUUM")
+            await self.db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+        self._info_cache = None
+        logger.info("Vacuumed SQLite database")
+
     async def close(self):
         """Close database"""
+        if self._flusher:
+            # Let the flusher write what is still queued, then stop
+            self._closing = True
+            self._flush_event.set()
+            await self._flusher
+            self._flusher = None
+
+            if self._pending:
+                logger.error(f"Dropped {len(self._pending)} messages that could not be stored")
+                self._pending = []
+
+        await self._close_readers()
+
         if self.db:
             await self.db.close()
             logger.info("SQLite storage closed")
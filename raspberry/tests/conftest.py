@@ -0,0 +1,10 @@
+"""
+Test configuration
+
+Makes the package under src/ importable without installing it.
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
@@ -0,0 +1,153 @@
+"""
+Tests for the message buffer
+
+_RingQueue relies on asyncio.Queue internals (_init/_put/_get hooks,
+_getters/_putters and _wakeup_next), so these also guard against
+changes to those internals in newer Python versions.
+"""
+
+import asyncio
+
+import pytest
+
+from mqtt_telemetry.buffer import MessageBuffer, _RingBuffer, _RingQueue
+
+
+def test_ring_capacity_rounds_up_to_power_of_two():
+    assert len(_RingBuffer(1)._slots) == 1
+    assert len(_RingBuffer(5)._slots) == 8
+    assert len(_RingBuffer(8)._slots) == 8
+
+
+def test_ring_wraps_around():
+    ring = _RingBuffer(4)
+
+    # Move head and tail past the end of the slot list a few times
+    for i in range(10):
+        ring.append(i)
+        ring.append(i + 100)
+        assert ring.popleft() == i
+        assert ring.popleft() == i + 100
+
+    for i in range(3):
+        ring.append(i)
+    assert ring.popleft() == 0
+    ring.append(3)
+    ring.append(4)
+
+    assert list(ring) == [1, 2, 3, 4]
+    assert ring.popmany(10) == [1, 2, 3, 4]
+    assert len(ring) == 0
+    assert ring._slots == [None] * 4
+
+
+def test_ring_extendleft_keeps_order_and_checks_capacity():
+    ring = _RingBuffer(4)
+    ring.append(3)
+    ring.append(4)
+
+    ring.extendleft([1, 2])
+    assert list(ring) == [1, 2, 3, 4]
+
+    with pytest.raises(OverflowError):
+        ring.extendleft([0])
+
+    assert ring.popmany(3) == [1, 2, 3]
+    assert ring.popleft() == 4
+
+
+@pytest.mark.asyncio
+async def test_queue_repr_lists_items():
+    queue = _RingQueue(maxsize=4)
+    queue.put_nowait("a")
+    queue.put_nowait("b")
+
+    assert "_queue=['a', 'b']" in repr(queue)
+
+
+@pytest.mark.asyncio
+async def test_queue_put_front_wakes_getter():
+    queue = _RingQueue(maxsize=4)
+    getter = asyncio.ensure_future(queue.get())
+    await asyncio.sleep(0)
+
+    queue.put_many_front_nowait(["a", "b"])
+    assert await asyncio.wait_for(getter, timeout=1) == "a"
+    assert queue.get_nowait() == "b"
+
+
+@pytest.mark.asyncio
+async def test_queue_get_many_wakes_putter():
+    queue = _RingQueue(maxsize=2)
+    queue.put_nowait(1)
+    queue.put_nowait(2)
+    putter = asyncio.ensure_future(queue.put(3))
+    await asyncio.sleep(0)
+    assert not putter.done()
+
+    assert queue.get_many_nowait(2) == [1, 2]
+    await asyncio.wait_for(putter, timeout=1)
+    assert queue.get_nowait() == 3
+
+
+@pytest.mark.asyncio
+async def test_push_drops_when_full():
+    buffer = MessageBuffer(size=2)
+
+    assert await buffer.push(1)
+    assert await buffer.push(2)
+    assert not await buffer.push(3)
+
+    assert buffer.is_full
+    assert buffer.dropped_count == 1
+    assert await buffer.flush() == [1, 2]
+
+
+@pytest.mark.asyncio
+async def test_requeue_at_capacity_drops_overflow():
+    buffer = MessageBuffer(size=4)
+    for i in (10, 11, 12):
+        await buffer.push(i)
+
+    # Only one slot is free, so the requeued batch is cut to its start
+    assert await buffer.requeue([0, 1, 2]) == 1
+    assert buffer.dropped_count == 2
+    assert await buffer.flush() == [0, 10, 11, 12]
+
+    assert await buffer.requeue([0, 1]) == 2
+    assert await buffer.flush() == [0, 1]
+
+
+@pytest.mark.asyncio
+async def test_get_batch_collects_until_batch_size():
+    buffer = MessageBuffer(size=16, flush_interval=1, batch_size=4)
+    for i in range(6):
+        await buffer.push(i)
+
+    assert await buffer.get_batch(timeout=1) == [0, 1, 2, 3]
+    assert await buffer.get_batch(timeout=1) == [4, 5]
+    assert await buffer.get_batch(timeout=0.01) == []
+
+
+@pytest.mark.asyncio
+async def test_get_batch_cancelled_mid_batch_requeues():
+    buffer = MessageBuffer(size=4, flush_interval=1, batch_size=10)
+    for i in range(4):
+        await buffer.push(i)
+
+    task = asyncio.ensure_future(buffer.get_batch(timeout=1))
+    await asyncio.sleep(0.01)
+
+    # Refill the buffer while the batch is still being collected
+    for i in range(10, 14):
+        await buffer.push(i)
+    await asyncio.sleep(0.01)
+
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    # The collected batch goes back in front; what no longer fits is dropped
+    assert len(buffer) == 4
+    assert buffer.dropped_count == 4
+    assert await buffer.flush() == [0, 1, 2, 3]
@@ -0,0 +1,155 @@
+"""
+Tests for the filesystem storage backend
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from mqtt_telemetry.message import TelemetryMessage
+from mqtt_telemetry.storage.filesystem import FilesystemStorage
+
+
+def make_messages(count: int, start: datetime):
+    return [
+        TelemetryMessage(
+            f"sensors/{i % 2}",
+            {"value": i, "label": "ü"},
+            start + timedelta(seconds=i),
+            start + timedelta(seconds=i)
+        )
+        for i in range(count)
+    ]
+
+
+async def open_storage(base_path, compression: str = "none") -> FilesystemStorage:
+    storage = FilesystemStorage({
+        "filesystem": {"base_path": str(base_path), "compression": compression}
+    })
+    await storage.initialize()
+    return storage
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("compression", ["none", "gzip", "zstd"])
+async def test_round_trip(tmp_path, compression):
+    if compression == "zstd":
+        pytest.importorskip("zstandard")
+
+    start = datetime.now().replace(microsecond=0)
+    storage = await open_storage(tmp_path, compression)
+
+    try:
+        assert await storage.store_batch(make_messages(20, start))
+        assert await storage.store_batch(make_messages(5, start + timedelta(seconds=20)))
+
+        messages = await storage.query(limit=100)
+        assert len(messages) == 25
+        assert messages[0]["payload"] == {"value": 0, "label": "ü"}
+
+        by_topic = await storage.query(topic="sensors/1", limit=100)
+        assert len(by_topic) == 12
+        assert all(msg["topic"] == "sensors/1" for msg in by_topic)
+
+        in_range = await storage.query(
+            start_time=start + timedelta(seconds=5),
+            end_time=start + timedelta(seconds=9),
+            limit=100
+        )
+        assert len(in_range) == 5
+
+        assert len(await storage.query(limit=3)) == 3
+
+        info = await storage.get_info()
+        assert info.total_messages == 25
+        assert info.total_size_bytes > 0
+        assert info.oldest_message == start
+        assert info.newest_message == start + timedelta(seconds=24)
+
+    finally:
+        await storage.close()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("compression", ["none", "gzip"])
+async def test_reopen_keeps_totals(tmp_path, compression):
+    start = datetime.now().replace(microsecond=0)
+
+    storage = await open_storage(tmp_path, compression)
+    assert await storage.store_batch(make_messages(10, start))
+    await storage.close()
+
+    # Finished files get a sidecar holding their totals
+    assert list(tmp_path.glob("*/*/*/*.meta"))
+    size = sum(path.stat().st_size for path in tmp_path.glob("*/*/*/*.jsonl*"))
+
+    storage = await open_storage(tmp_path, compression)
+    try:
+        reopened = await storage.get_info()
+        assert reopened.total_messages == 10
+        assert reopened.total_size_bytes == size
+        assert reopened.oldest_message == start
+        assert reopened.newest_message == start + timedelta(seconds=9)
+
+        assert await storage.store_batch(make_messages(3, start + timedelta(seconds=10)))
+        assert (await storage.get_info()).total_messages == 13
+        assert len(await storage.query(limit=100)) == 13
+
+    finally:
+        await storage.close()
+
+
+def write_old_file(base_path, day: datetime, count: int):
+    """Write a finished file without sidecar, as an older version would"""
+    day_dir = base_path / day.strftime("%Y/%m/%d")
+    day_dir.mkdir(parents=True, exist_ok=True)
+    file_path = day_dir / f"telemetry_{day.strftime('%Y%m%d_%H%M%S')}.jsonl"
+    file_path.write_text("".join(
+        f'{{"topic": "old", "payload": {i}, "timestamp": "{day.isoformat()}", '
+        f'"received_at": "{day.isoformat()}"}}\n'
+        for i in range(count)
+    ))
+    return file_path
+
+
+@pytest.mark.asyncio
+async def test_cleanup_across_day_directories(tmp_path):
+    write_old_file(tmp_path, datetime(2024, 1, 2, 10, 0, 0), 3)
+    write_old_file(tmp_path, datetime(2024, 1, 3, 10, 0, 0), 4)
+    kept = write_old_file(tmp_path, datetime(2024, 2, 1, 10, 0, 0), 5)
+
+    storage = await open_storage(tmp_path)
+
+    try:
+        assert (await storage.get_info()).total_messages == 12
+
+        deleted = await storage.cleanup(datetime(2024, 1, 15))
+        assert deleted == 2
+
+        # Whole days are removed, along with the month left empty
+        assert not (tmp_path / "2024" / "01").exists()
+        assert kept.exists()
+        assert (await storage.get_info()).total_messages == 5
+
+    finally:
+        await storage.close()
+
+
+@pytest.mark.asyncio
+async def test_cleanup_keeps_current_file(tmp_path):
+    start = datetime.now().replace(microsecond=0)
+    storage = await open_storage(tmp_path)
+
+    try:
+        assert await storage.store_batch(make_messages(3, start))
+        await storage.get_info()
+
+        assert await storage.cleanup(datetime.now() + timedelta(days=1)) == 0
+        assert storage.current_file.exists()
+
+        assert await storage.store_batch(make_messages(5, start + timedelta(seconds=3)))
+        assert len(await storage.query(limit=100)) == 8
+        assert (await storage.get_info()).total_messages == 8
+
+    finally:
+        await storage.close()
@@ -0,0 +1,50 @@
+"""
+Tests for the SQLite storage backend
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from mqtt_telemetry.storage.sqlite import SQLiteStorage
+
+
+def make_messages(count: int):
+    start = datetime(2024, 1, 1, 12, 0, 0)
+    return [
+        {
+            "topic": f"sensors/{i % 2}",
+            "payload": {"value": i},
+            "timestamp": start + timedelta(seconds=i),
+            "received_at": start + timedelta(seconds=i)
+        }
+        for i in range(count)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_iter_query_stopped_early_keeps_read_pool_available(tmp_path):
+    storage = SQLiteStorage({
+        "sqlite": {"path": str(tmp_path / "telemetry.db"), "read_pool_size": 2}
+    })
+    await storage.initialize()
+
+    try:
+        assert await storage.store_batch(make_messages(10))
+
+        # Stop more iterators than there are pooled readers after one row,
+        # keeping the generators alive without closing them
+        iterators = [storage.iter_query() for _ in range(3)]
+        for iterator in iterators:
+            message = await iterator.__anext__()
+            assert message["payload"] == {"value": 9}
+
+        messages = await asyncio.wait_for(storage.query(limit=100), timeout=5)
+        assert len(messages) == 10
+
+        for iterator in iterators:
+            await iterator.aclose()
+
+    finally:
+        await storage.close()